@@ -0,0 +1,63 @@
+# app/api/responses.py
+"""
+Clases de respuesta compartidas por los routers.
+
+ORJSONResponse serializa con orjson (datetime/date nativos, Decimal → número,
+filas de SQLAlchemy como dict)
+y cae a JSONResponse estándar si orjson no está instalado.
+
+DocxFileResponse envía reportes DOCX desde disco en bloques de 1 MiB.
+"""
+
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import FileResponse, JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+    print("⚠️ orjson no instalado, se usará JSONResponse estándar")
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Tipos que orjson no serializa de forma nativa"""
+    if isinstance(obj, Decimal):
+        # Contrato público: los montos DECIMAL(10,2) salen como número JSON
+        return float(obj)
+    if isinstance(obj, Mapping):  # RowMapping de SQLAlchemy
+        return dict(obj)
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+if orjson is not None:
+    class ORJSONResponse(JSONResponse):
+        media_type = "application/json"
+
+        def render(self, content: Any) -> bytes:
+            return orjson.dumps(
+                content,
+                default=_orjson_default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_SUBCLASS,
+            )
+else:
+    ORJSONResponse = JSONResponse
+
+
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+class DocxFileResponse(FileResponse):
+    """
+    FileResponse para reportes DOCX con lecturas de 1 MiB (por defecto 64 KiB):
+    menos read()/send() por archivo. Content-Length/ETag salen del stat del archivo.
+    """
+    chunk_size = 1024 * 1024
+
+    def __init__(self, path: str, filename: str, **kwargs: Any) -> None:
+        super().__init__(path, filename=filename, media_type=DOCX_MEDIA_TYPE, **kwargs)
+
+
+__all__ = ["ORJSONResponse", "DocxFileResponse", "DOCX_MEDIA_TYPE"]
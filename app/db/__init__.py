@@ -34,6 +34,20 @@ except Exception:
         return datetime.now()
 
 
+def _mysql_driver() -> str:
+    """
+    Driver MySQL a usar: mysqlclient (MySQLdb) si está instalado, pymysql como respaldo.
+    DB_MYSQL_DRIVER=pymysql fuerza el driver puro Python.
+    """
+    if os.getenv("DB_MYSQL_DRIVER", "mysqldb").lower() == "pymysql":
+        return "pymysql"
+    try:
+        import MySQLdb  # noqa: F401
+        return "mysqldb"
+    except ImportError:
+        return "pymysql"
+
+
 def _build_sqlalchemy_url() -> str:
     """Construye la URL de SQLAlchemy desde variables de entorno."""
     database_url = os.getenv("DATABASE_URL")
@@ -44,8 +58,13 @@ def _build_sqlalchemy_url() -> str:
         elif "mssql+pyodbc://" in database_url:
             print("✅ Detectado: SQL Server con pyodbc (desde DATABASE_URL)")
             return database_url
-        elif database_url.startswith("mysql+pymysql://"):
-            print("✅ Detectado: MySQL (desde DATABASE_URL)")
+        elif database_url.startswith(("mysql+pymysql://", "mysql+mysqldb://")):
+            driver = _mysql_driver()
+            if database_url.startswith("mysql+pymysql://") and driver == "mysqldb":
+                database_url = "mysql+mysqldb://" + database_url[len("mysql+pymysql://"):]
+            elif database_url.startswith("mysql+mysqldb://") and driver == "pymysql":
+                database_url = "mysql+pymysql://" + database_url[len("mysql+mysqldb://"):]
+            print(f"✅ Detectado: MySQL con {driver} (desde DATABASE_URL)")
             return database_url
     
     db_type = os.getenv("DB_TYPE", "").lower()
@@ -71,26 +90,72 @@ def _build_sqlalchemy_url() -> str:
         return url
     
     port = port or "3306"
+    driver = _mysql_driver()
     auth = f"{up.quote_plus(user)}:{up.quote_plus(pwd)}"
-    url = f"mysql+pymysql://{auth}@{host}:{port}/{name}?charset=utf8mb4"
-    print(f"✅ Construido URL MySQL: {host}:{port}/{name}")
+    url = f"mysql+{driver}://{auth}@{host}:{port}/{name}?charset=utf8mb4"
+    print(f"✅ Construido URL MySQL ({driver}): {host}:{port}/{name}")
     return url
 
 
+def _env_int(nombre: str, defecto: int) -> int:
+    """Entero desde variable de entorno (valor por defecto si falta o no es válido)"""
+    try:
+        return int(os.getenv(nombre, defecto))
+    except (TypeError, ValueError):
+        print(f"⚠️ {nombre} inválido, usando {defecto}")
+        return defecto
+
+
+# Pool configurable por entorno (DB_POOL_* para la API, DB_DAEMON_POOL_* para el daemon)
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+DB_POOL_MAX_OVERFLOW = _env_int("DB_POOL_MAX_OVERFLOW", 20)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 280)
+DB_DAEMON_POOL_SIZE = _env_int("DB_DAEMON_POOL_SIZE", 2)
+DB_DAEMON_POOL_MAX_OVERFLOW = _env_int("DB_DAEMON_POOL_MAX_OVERFLOW", 2)
+
+
 # Crear Engine - SIN connect_args para pymssql
 try:
     DATABASE_URL = _build_sqlalchemy_url()
     
     # pymssql NO acepta connect_args, así que NO lo pasamos
+    # Pool explícito: peticiones HTTP concurrentes + scheduler comparten este engine.
+    # pool_use_lifo: se reutiliza la conexión devuelta más recientemente (ya caliente)
+    # y las sobrantes quedan ociosas hasta que pool_recycle las renueva.
     engine = create_engine(
         DATABASE_URL,
         future=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_POOL_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_use_lifo=True,
         pool_pre_ping=True,
-        pool_recycle=280,
+        pool_recycle=DB_POOL_RECYCLE,
+        insertmanyvalues_page_size=1000,
+        query_cache_size=1200,
+        echo=False
+    )
+    
+    # Engine dedicado al daemon: pool pequeño propio para que el procesamiento
+    # en segundo plano nunca compita por conexiones con la API
+    daemon_engine = create_engine(
+        DATABASE_URL,
+        future=True,
+        pool_size=DB_DAEMON_POOL_SIZE,
+        max_overflow=DB_DAEMON_POOL_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_use_lifo=True,
+        pool_pre_ping=True,
+        pool_recycle=DB_POOL_RECYCLE,
         echo=False
     )
     
     SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    # expire_on_commit=False: el daemon usa los objetos ya cerrada la sesión corta
+    DaemonSessionLocal = sessionmaker(
+        bind=daemon_engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True
+    )
     Base = declarative_base()
     
     print("✅ Engine de base de datos creado correctamente")
@@ -132,7 +197,9 @@ def get_db_for_data_load():
 
 __all__ = [
     "engine",
+    "daemon_engine",
     "SessionLocal",
+    "DaemonSessionLocal",
     "Base",
     "get_db",
     "test_connection",
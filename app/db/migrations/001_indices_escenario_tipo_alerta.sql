@@ -0,0 +1,11 @@
+-- app/db/migrations/001_indices_escenario_tipo_alerta.sql
+-- Índices sobre los campos por los que se filtran consultas y reportes.
+--
+-- escenario (de_consultas_rpa) y tipo_alerta (de_reportes_rpa) ya existen como
+-- columnas escalares junto a los JSON datos_capturados / data_snapshot, así que
+-- no hace falta una columna generada desde el JSON: basta con indexarlas.
+-- Sintaxis válida en SQL Server y MySQL 8.
+
+CREATE INDEX ix_de_consultas_rpa_escenario ON de_consultas_rpa (escenario);
+
+CREATE INDEX ix_de_reportes_rpa_tipo_alerta ON de_reportes_rpa (tipo_alerta);
@@ -0,0 +1,6 @@
+-- app/db/migrations/002_indice_de_lista_keyset.sql
+-- Índice que sirve el ORDER BY y el predicado keyset de GET /lista:
+-- (fecha_creacion DESC, id_lista DESC) → range scan, sin sort.
+-- Sintaxis válida en SQL Server y MySQL 8.
+
+CREATE INDEX ix_de_lista_fecha_creacion_id ON de_lista (fecha_creacion DESC, id_lista DESC);
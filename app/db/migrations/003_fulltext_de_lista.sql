@@ -0,0 +1,17 @@
+-- app/db/migrations/003_fulltext_de_lista.sql
+-- Índice full-text para la búsqueda `q` de GET /lista (nombre, apellido).
+-- ci y ruc se buscan por prefijo y usan índices B-tree normales.
+-- Ejecutar SOLO el bloque del motor destino.
+
+-- ===== MySQL 8 =====
+ALTER TABLE de_lista ADD FULLTEXT KEY ft_de_lista_nombre_apellido (nombre, apellido);
+CREATE INDEX ix_de_lista_ci ON de_lista (ci);
+CREATE INDEX ix_de_lista_ruc ON de_lista (ruc);
+
+-- ===== SQL Server =====
+-- CREATE FULLTEXT CATALOG ft_catalogo_rpa AS DEFAULT;
+-- CREATE FULLTEXT INDEX ON de_lista (nombre, apellido)
+--     KEY INDEX PK_de_lista  -- nombre real de la PK de de_lista
+--     WITH CHANGE_TRACKING AUTO;
+-- CREATE INDEX ix_de_lista_ci ON de_lista (ci);
+-- CREATE INDEX ix_de_lista_ruc ON de_lista (ruc);
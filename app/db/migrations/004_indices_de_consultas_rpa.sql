@@ -0,0 +1,11 @@
+-- app/db/migrations/004_indices_de_consultas_rpa.sql
+-- Consolida los índices secundarios de de_consultas_rpa en uno compuesto.
+-- Se crea primero el compuesto: en MySQL la FK proceso_id necesita un índice
+-- cuya primera columna sea proceso_id antes de poder borrar el individual.
+-- Sintaxis válida en SQL Server y MySQL 8.
+
+CREATE INDEX ix_de_consultas_rpa_proceso_estado ON de_consultas_rpa (proceso_id, estado);
+
+DROP INDEX ix_de_consultas_rpa_proceso_id ON de_consultas_rpa;
+DROP INDEX ix_de_consultas_rpa_estado ON de_consultas_rpa;
+DROP INDEX ix_de_consultas_rpa_fecha_inicio ON de_consultas_rpa;
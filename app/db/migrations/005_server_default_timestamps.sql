@@ -0,0 +1,14 @@
+-- app/db/migrations/005_server_default_timestamps.sql
+-- Marcas de creación asignadas por el servidor (server_default=func.now() en
+-- models_new.py). Sin este DEFAULT los INSERT que omiten la columna fallan
+-- por NOT NULL. Ejecutar SOLO el bloque del motor destino.
+
+-- ===== SQL Server =====
+ALTER TABLE de_paginas_rpa ADD CONSTRAINT df_de_paginas_rpa_fecha_creacion DEFAULT GETDATE() FOR fecha_creacion;
+ALTER TABLE de_procesos_rpa ADD CONSTRAINT df_de_procesos_rpa_fecha_creacion DEFAULT GETDATE() FOR fecha_creacion;
+ALTER TABLE de_reportes_rpa ADD CONSTRAINT df_de_reportes_rpa_fecha_generacion DEFAULT GETDATE() FOR fecha_generacion;
+
+-- ===== MySQL 8 =====
+-- ALTER TABLE de_paginas_rpa MODIFY fecha_creacion DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP;
+-- ALTER TABLE de_procesos_rpa MODIFY fecha_creacion DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP;
+-- ALTER TABLE de_reportes_rpa MODIFY fecha_generacion DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP;
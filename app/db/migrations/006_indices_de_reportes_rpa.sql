@@ -0,0 +1,15 @@
+-- app/db/migrations/006_indices_de_reportes_rpa.sql
+-- Índices compuestos de de_reportes_rpa para los listados de reportes:
+--   - reportes de un cliente ordenados por fecha (cliente_id, fecha_generacion, id)
+--   - último reporte exitoso de un proceso (proceso_id, generado_exitosamente, fecha_generacion)
+-- ORDER BY ... DESC se resuelve recorriendo el índice hacia atrás, no hace falta DESC.
+-- Se crean antes de borrar los individuales: en MySQL las FK necesitan un índice
+-- cuya primera columna sea la de la FK.
+-- Sintaxis válida en SQL Server y MySQL 8.
+
+CREATE INDEX ix_de_reportes_rpa_cliente_fecha ON de_reportes_rpa (cliente_id, fecha_generacion, id);
+
+CREATE INDEX ix_de_reportes_rpa_proceso_exitoso ON de_reportes_rpa (proceso_id, generado_exitosamente, fecha_generacion);
+
+DROP INDEX ix_de_reportes_rpa_cliente_id ON de_reportes_rpa;
+DROP INDEX ix_de_reportes_rpa_proceso_id ON de_reportes_rpa;
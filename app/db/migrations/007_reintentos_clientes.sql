@@ -0,0 +1,13 @@
+-- app/db/migrations/007_reintentos_clientes.sql
+-- Backoff de reintentos del daemon en de_clientes_rpa_v2 (ver de_cliente_v2.py):
+--   - INTENTOS_CONSULTA: fallos consecutivos del cliente
+--   - PROXIMO_REINTENTO: el daemon no reclama el cliente antes de esta fecha
+-- Ejecutar SOLO el bloque del motor destino.
+
+-- ===== SQL Server =====
+ALTER TABLE de_clientes_rpa_v2 ADD INTENTOS_CONSULTA INT NOT NULL CONSTRAINT df_de_clientes_rpa_v2_intentos DEFAULT 0;
+ALTER TABLE de_clientes_rpa_v2 ADD PROXIMO_REINTENTO DATETIME NULL;
+
+-- ===== MySQL 8 =====
+-- ALTER TABLE de_clientes_rpa_v2 ADD COLUMN INTENTOS_CONSULTA INT NOT NULL DEFAULT 0;
+-- ALTER TABLE de_clientes_rpa_v2 ADD COLUMN PROXIMO_REINTENTO DATETIME NULL;
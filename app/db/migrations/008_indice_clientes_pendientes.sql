@@ -0,0 +1,15 @@
+-- app/db/migrations/008_indice_clientes_pendientes.sql
+-- Índice para la cola del daemon (_reclamar_clientes_pendientes):
+--   WHERE ESTADO_CONSULTA = 'Pendiente' ORDER BY FECHA_CREACION_REGISTRO
+-- Los pendientes se leen ya ordenados por fecha: index seek + TOP/LIMIT, sin sort.
+-- Ejecutar SOLO el bloque del motor destino.
+
+-- ===== SQL Server =====
+-- Índice filtrado: solo contiene las filas pendientes, se mantiene pequeño
+-- aunque la tabla crezca con los clientes ya procesados.
+CREATE INDEX ix_de_clientes_rpa_v2_pendientes ON de_clientes_rpa_v2 (ESTADO_CONSULTA, FECHA_CREACION_REGISTRO)
+    WHERE ESTADO_CONSULTA = 'Pendiente';
+
+-- ===== MySQL 8 =====
+-- (sin índices parciales: compuesto con la igualdad primero)
+-- CREATE INDEX ix_de_clientes_rpa_v2_pendientes ON de_clientes_rpa_v2 (ESTADO_CONSULTA, FECHA_CREACION_REGISTRO);
@@ -0,0 +1,17 @@
+-- app/db/migrations/009_indice_clientes_pendientes_reintento.sql
+-- Rehace ix_de_clientes_rpa_v2_pendientes (008) agregando PROXIMO_REINTENTO (007)
+-- como última columna: la cola del daemon filtra además por
+--   PROXIMO_REINTENTO IS NULL OR PROXIMO_REINTENTO <= :ahora
+-- y así tanto el reclamo (TOP/LIMIT n) como el COUNT de pendientes listos se
+-- resuelven leyendo solo el índice, sin ir a la fila por cada pendiente.
+-- Ejecutar SOLO el bloque del motor destino.
+
+-- ===== SQL Server =====
+-- Sigue siendo un índice filtrado: solo contiene las filas pendientes.
+CREATE INDEX ix_de_clientes_rpa_v2_pendientes ON de_clientes_rpa_v2 (ESTADO_CONSULTA, FECHA_CREACION_REGISTRO, PROXIMO_REINTENTO)
+    WHERE ESTADO_CONSULTA = 'Pendiente'
+    WITH (DROP_EXISTING = ON);
+
+-- ===== MySQL 8 =====
+-- DROP INDEX ix_de_clientes_rpa_v2_pendientes ON de_clientes_rpa_v2;
+-- CREATE INDEX ix_de_clientes_rpa_v2_pendientes ON de_clientes_rpa_v2 (ESTADO_CONSULTA, FECHA_CREACION_REGISTRO, PROXIMO_REINTENTO);
@@ -8,7 +8,7 @@ from __future__ import annotations
 from typing import Optional
 from datetime import datetime
 
-from sqlalchemy import Integer, String, DateTime
+from sqlalchemy import Integer, String, DateTime, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db import Base
@@ -21,6 +21,16 @@ class DeClienteV2(Base):
     Sincronización DB2 → SQL Server (nueva versión V2)
     """
     __tablename__ = "de_clientes_rpa_v2"
+    __table_args__ = (
+        # Cola del daemon: WHERE ESTADO_CONSULTA='Pendiente' AND PROXIMO_REINTENTO vencido
+        # ORDER BY FECHA_CREACION_REGISTRO (filtrado a los pendientes en SQL Server;
+        # compuesto en MySQL). PROXIMO_REINTENTO al final: el filtro se resuelve en el índice
+        Index(
+            "ix_de_clientes_rpa_v2_pendientes",
+            "ESTADO_CONSULTA", "FECHA_CREACION_REGISTRO", "PROXIMO_REINTENTO",
+            mssql_where=text("ESTADO_CONSULTA = 'Pendiente'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     
@@ -43,4 +53,9 @@ class DeClienteV2(Base):
     
     ESTADO_CONSULTA: Mapped[str] = mapped_column(String(50), nullable=False, default='Pendiente', index=True)
     
-    FECHA_CREACION_REGISTRO: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now, index=True)
\ No newline at end of file
+    FECHA_CREACION_REGISTRO: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now, index=True)
+    
+    # Backoff del daemon: un cliente que falla vuelve a 'Pendiente' pero no se
+    # reintenta antes de PROXIMO_REINTENTO (espera que crece con INTENTOS_CONSULTA)
+    INTENTOS_CONSULTA: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    PROXIMO_REINTENTO: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
\ No newline at end of file
@@ -3,8 +3,9 @@ from __future__ import annotations
 
 from typing import Optional, Dict, Any, List
 from datetime import datetime, date
+from decimal import Decimal
 
-from sqlalchemy import Integer, String, Text, Boolean, ForeignKey, JSON, DateTime, DECIMAL, BIGINT
+from sqlalchemy import Integer, String, Text, Boolean, ForeignKey, JSON, DateTime, DECIMAL, BIGINT, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
@@ -24,7 +25,7 @@ class DePagina(Base):
     descripcion: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     activa: Mapped[bool] = mapped_column(Boolean, default=True, index=True)
     orden_display: Mapped[int] = mapped_column(Integer, default=0, index=True)
-    fecha_creacion: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+    fecha_creacion: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
 
     # Relaciones
     consultas: Mapped[List["DeConsulta"]] = relationship("DeConsulta", back_populates="pagina")
@@ -43,14 +44,14 @@ class DeProceso(Base):
     
     # Metadatos (snapshot del cliente)
     tipo_alerta: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
-    monto_usd: Mapped[Optional[float]] = mapped_column(DECIMAL(10, 2), nullable=True)
+    monto_usd: Mapped[Optional[Decimal]] = mapped_column(DECIMAL(10, 2), nullable=True)
     fecha_alerta: Mapped[Optional[date]] = mapped_column(DateTime, nullable=True)
     
     # Control de flujo
     estado: Mapped[str] = mapped_column(String(50), nullable=False, default='Pendiente', index=True)
     
     # Timestamps
-    fecha_creacion: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now, index=True)
+    fecha_creacion: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now(), index=True)
     fecha_inicio: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     fecha_fin: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
@@ -66,6 +67,8 @@ class DeProceso(Base):
     mensaje_error_general: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     # ✅ Relaciones (SOLO con tablas nuevas)
+    # Carga perezosa por defecto: las consultas que recorren los hijos los piden
+    # con selectinload(...) (1 query extra por relación, no N)
     consultas: Mapped[List["DeConsulta"]] = relationship("DeConsulta", back_populates="proceso", cascade="all, delete-orphan")
     reportes: Mapped[List["DeReporte"]] = relationship("DeReporte", back_populates="proceso")
 
@@ -73,23 +76,29 @@ class DeProceso(Base):
 class DeConsulta(Base):
     """Modelo para de_consultas_rpa (consultas individuales por página)"""
     __tablename__ = "de_consultas_rpa"
+    # Un solo índice compuesto para el filtro habitual (proceso_id, estado);
+    # su columna líder también cubre la FK proceso_id
+    __table_args__ = (
+        Index("ix_de_consultas_rpa_proceso_estado", "proceso_id", "estado"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    proceso_id: Mapped[int] = mapped_column(Integer, ForeignKey("de_procesos_rpa.id"), nullable=False, index=True)
+    proceso_id: Mapped[int] = mapped_column(Integer, ForeignKey("de_procesos_rpa.id"), nullable=False)
     pagina_id: Mapped[int] = mapped_column(Integer, ForeignKey("de_paginas_rpa.id"), nullable=False, index=True)
     
     # Datos enviados
     valor_enviado: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
-    parametros_extra: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    # JSON pesados: diferidos, solo se leen al acceder explícitamente al atributo
+    parametros_extra: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True, deferred=True)
     
     # Estado individual
-    estado: Mapped[str] = mapped_column(String(50), nullable=False, default='Pendiente', index=True)
+    estado: Mapped[str] = mapped_column(String(50), nullable=False, default='Pendiente')
     
     # Resultados
     screenshot_path: Mapped[Optional[str]] = mapped_column(String(1000), nullable=True)
     screenshot_historial_path: Mapped[Optional[str]] = mapped_column(String(1000), nullable=True)
-    datos_capturados: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
-    escenario: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    datos_capturados: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True, deferred=True)
+    escenario: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, index=True)
     mensaje_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # Control de reintentos
@@ -97,7 +106,7 @@ class DeConsulta(Base):
     max_intentos: Mapped[int] = mapped_column(Integer, default=2)
     
     # Métricas de rendimiento
-    fecha_inicio: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, index=True)
+    fecha_inicio: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     fecha_fin: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     duracion_segundos: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
@@ -110,14 +119,21 @@ class DeReporte(Base):
     """Modelo para de_reportes_rpa (reportes generados)"""
     __tablename__ = "de_reportes_rpa"
 
+    # Compuestos para los accesos reales: reportes de un cliente por fecha y
+    # último reporte exitoso de un proceso. Sus columnas líderes cubren las FK.
+    __table_args__ = (
+        Index("ix_de_reportes_rpa_cliente_fecha", "cliente_id", "fecha_generacion", "id"),
+        Index("ix_de_reportes_rpa_proceso_exitoso", "proceso_id", "generado_exitosamente", "fecha_generacion"),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    proceso_id: Mapped[int] = mapped_column(Integer, ForeignKey("de_procesos_rpa.id"), nullable=False, index=True)
+    proceso_id: Mapped[int] = mapped_column(Integer, ForeignKey("de_procesos_rpa.id"), nullable=False)
     # ✅ FK apunta a de_clientes_rpa_v2 (TABLA NUEVA - SINCRONIZADA DESDE DB2)
-    cliente_id: Mapped[int] = mapped_column(Integer, ForeignKey("de_clientes_rpa_v2.id"), nullable=False, index=True)
+    cliente_id: Mapped[int] = mapped_column(Integer, ForeignKey("de_clientes_rpa_v2.id"), nullable=False)
     
     # Metadatos del proceso
-    tipo_alerta: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
-    monto_usd: Mapped[Optional[float]] = mapped_column(DECIMAL(10, 2), nullable=True)
+    tipo_alerta: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, index=True)
+    monto_usd: Mapped[Optional[Decimal]] = mapped_column(DECIMAL(10, 2), nullable=True)
     fecha_alerta: Mapped[Optional[date]] = mapped_column(DateTime, nullable=True)
     job_id: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, index=True)
     
@@ -132,12 +148,12 @@ class DeReporte(Base):
     tipo_archivo: Mapped[str] = mapped_column(String(50), nullable=False, default='DOCX', index=True)
     generado_exitosamente: Mapped[bool] = mapped_column(Boolean, default=False)
     
-    # Datos
-    data_snapshot: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    # Datos (diferido: los listados nunca necesitan el snapshot completo)
+    data_snapshot: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True, deferred=True)
     
     # Métricas
     tiempo_generacion_segundos: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    fecha_generacion: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now, index=True)
+    fecha_generacion: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now(), index=True)
 
     # ✅ Relaciones (SOLO con tablas nuevas)
     proceso: Mapped["DeProceso"] = relationship("DeProceso", back_populates="reportes")
\ No newline at end of file
@@ -87,18 +87,21 @@ def ejecutar_query_db2(
 
 def test_conexion_db2() -> bool:
     """Prueba la conexión a DB2"""
+    conn = None
     try:
         conn = conectar_db2()
         cursor = conn.cursor()
         cursor.execute("SELECT 1 AS test FROM SYSIBM.SYSDUMMY1")
         result = cursor.fetchone()
-        conn.close()
         
         print("✅ Conexión a DB2 exitosa")
         return True
     except Exception as e:
         print(f"❌ Error de conexión a DB2: {str(e)}")
         return False
+    finally:
+        if conn:
+            conn.close()
 
 
 def obtener_clientes_db2(
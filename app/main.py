@@ -3,15 +3,28 @@
 # ⚠️ CRÍTICO: Cargar .env ANTES de cualquier otra importación
 from app.load_env import verificar_credenciales
 
+import asyncio
+import os
+import threading
+import time
+
+import anyio.to_thread
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app.db import engine, daemon_engine
+from app.api.responses import ORJSONResponse, DOCX_MEDIA_TYPE
+
 app = FastAPI(
     title="Sistema de Consultas Función Judicial",
     description="Sistema automatizado con procesamiento en background",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configurar CORS
@@ -29,6 +42,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresión gzip de respuestas JSON (listados de clientes/reportes).
+# DOCX ya es un zip: se excluye para no recomprimirlo y conservar Content-Length.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=1024,
+    compresslevel=6,
+    exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + (DOCX_MEDIA_TYPE,),
+)
+
 # ===== IMPORTAR ROUTERS =====
 
 # Router de Tracking (principal)
@@ -63,12 +85,137 @@ try:
 except ImportError as e:
     print(f"⚠️ Router reports no disponible: {e}")
 
+# Router de Lista (de_lista: keyset + búsqueda full-text)
+try:
+    from app.routers.lista import router as lista_router
+    app.include_router(lista_router, prefix="/api")
+    print("✅ Router lista cargado")
+except ImportError as e:
+    print(f"⚠️ Router lista no disponible: {e}")
+
+# ===== DEPENDENCIAS DEL HEALTH CHECK (importadas una sola vez) =====
+
+# Ping a BD destino: como mucho uno cada DB_CHECK_TTL segundos (probes frecuentes).
+# En MySQL "DO 0" no genera result set; SQL Server no tiene DO.
+DB_CHECK_TTL = 10
+_PING_SQL = text("DO 0") if engine.dialect.name == "mysql" else text("SELECT 1")
+_ultimo_db_check = {"ts": 0.0, "resultado": None}
+
+def _verificar_db_destino() -> str:
+    ahora = time.monotonic()
+    if _ultimo_db_check["resultado"] is not None and ahora - _ultimo_db_check["ts"] < DB_CHECK_TTL:
+        return _ultimo_db_check["resultado"]
+    try:
+        with engine.connect() as conn:
+            conn.execute(_PING_SQL)
+        resultado = "ok"
+    except Exception as e:
+        resultado = f"error: {str(e)}"
+    _ultimo_db_check.update(ts=ahora, resultado=resultado)
+    return resultado
+
+def _estado_pool(eng) -> dict:
+    """Ocupación del pool de conexiones (para detectar saturación en /health)"""
+    pool = eng.pool
+    try:
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        }
+    except AttributeError:  # pools sin contadores (p. ej. StaticPool en tests)
+        return {"status": pool.status()}
+
+try:
+    from app.db.origen_db2 import test_conexion_db2
+except Exception as e:
+    test_conexion_db2 = None
+    print(f"⚠️ DB2 origen no disponible para health check: {e}")
+
+# Conexión de prueba a DB2 origen: mismo TTL que el ping a la BD destino
+_ultimo_db2_check = {"ts": 0.0, "resultado": None}
+
+def _verificar_db2() -> str:
+    ahora = time.monotonic()
+    if _ultimo_db2_check["resultado"] is not None and ahora - _ultimo_db2_check["ts"] < DB_CHECK_TTL:
+        return _ultimo_db2_check["resultado"]
+    try:
+        if test_conexion_db2 is None:
+            raise RuntimeError("módulo DB2 no disponible")
+        resultado = "ok" if test_conexion_db2() else "error"
+    except Exception as e:
+        resultado = f"error: {str(e)}"
+    _ultimo_db2_check.update(ts=ahora, resultado=resultado)
+    return resultado
+
+try:
+    from app.services.tracking_professional import get_paginas_activas_cached
+except Exception as e:
+    get_paginas_activas_cached = None
+    print(f"⚠️ Tracking no disponible para health check: {e}")
+
+try:
+    from app.services.daemon_procesador import obtener_estado_daemon, sistema_listo
+except Exception as e:
+    obtener_estado_daemon = None
+    sistema_listo = threading.Event()
+    print(f"⚠️ Daemon no disponible para health check: {e}")
+
+try:
+    from app.services.scheduler_sincronizacion import obtener_estado_scheduler
+except Exception as e:
+    obtener_estado_scheduler = None
+    print(f"⚠️ Scheduler no disponible para health check: {e}")
+
 # ===== EVENTOS DE STARTUP =====
 
+def _inicializacion_en_segundo_plano():
+    """
+    Trabajo lento del arranque (conexión DB2, scheduler).
+    Corre en un thread para que el worker acepte requests de inmediato.
+    """
+    try:
+        # --- Verificar DB origen (DB2) ---
+        try:
+            if test_conexion_db2 is None:
+                print("⚠️ DB2 origen no disponible")
+            elif test_conexion_db2():
+                print("✅ Conexión a DB2 verificada")
+        except Exception as e:
+            print(f"❌ Error de conexión a DB2: {e}")
+
+        # --- NUEVO: Inicializar Scheduler de Sincronización ---
+        try:
+            from app.services.scheduler_sincronizacion import inicializar_scheduler
+            if inicializar_scheduler():
+                print("✅ Scheduler de sincronización inicializado")
+            else:
+                print("⚠️ No se pudo inicializar scheduler de sincronización")
+        except ImportError:
+            print("⚠️ Scheduler de sincronización no disponible")
+        except Exception as e:
+            print(f"⚠️ Error inicializando scheduler: {e}")
+    finally:
+        sistema_listo.set()
+        print("🎯 Inicialización en segundo plano completada")
+
+
+_tarea_inicializacion = None
+
+# Los endpoints de BD son `def` (drivers síncronos pymssql/pymysql): FastAPI los
+# ejecuta en el threadpool de AnyIO. Su tamaño limita cuántas requests con I/O
+# de BD avanzan a la vez; se alinea con el pool de conexiones (10 + 20 overflow).
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", "30"))
+
 @app.on_event("startup")
 async def startup_event():
+    global _tarea_inicializacion
     print("🚀 Iniciando Sistema de Consultas v3.0")
 
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+    print(f"✅ Threadpool de endpoints síncronos: {API_THREADPOOL_SIZE} workers")
+
     # --- Verificar DB destino ---
     try:
         from app.db import engine
@@ -76,27 +223,8 @@ async def startup_event():
     except Exception as e:
         print(f"❌ Error de conexión a DB destino: {e}")
 
-    # --- Verificar DB origen (DB2) ---
-    try:
-        from app.db.origen_db2 import test_conexion_db2
-        if test_conexion_db2():
-            print("✅ Conexión a DB2 verificada")
-    except ImportError:
-        print("⚠️ DB2 origen no disponible")
-    except Exception as e:
-        print(f"❌ Error de conexión a DB2: {e}")
-
-    # --- NUEVO: Inicializar Scheduler de Sincronización ---
-    try:
-        from app.services.scheduler_sincronizacion import inicializar_scheduler
-        if inicializar_scheduler():
-            print("✅ Scheduler de sincronización inicializado")
-        else:
-            print("⚠️ No se pudo inicializar scheduler de sincronización")
-    except ImportError:
-        print("⚠️ Scheduler de sincronización no disponible")
-    except Exception as e:
-        print(f"⚠️ Error inicializando scheduler: {e}")
+    # DB2 + scheduler fuera del arranque: el worker queda listo sin esperarlos
+    _tarea_inicializacion = asyncio.create_task(asyncio.to_thread(_inicializacion_en_segundo_plano))
 
     print("🎯 Sistema listo para recibir requests")
 
@@ -105,10 +233,11 @@ async def shutdown_event():
     """Limpieza al cerrar el sistema"""
     print("🛑 Cerrando sistema...")
     
-    # Detener scheduler de sincronización
+    # Detener scheduler de sincronización (shutdown() espera al job en curso:
+    # se ejecuta en un hilo para no bloquear el event loop)
     try:
         from app.services.scheduler_sincronizacion import detener_scheduler
-        detener_scheduler()
+        await asyncio.to_thread(detener_scheduler)
     except Exception as e:
         print(f"⚠️ Error deteniendo scheduler: {e}")
     
@@ -169,34 +298,30 @@ def health_check():
         "status": "healthy",
         "timestamp": "2025-01-20T00:00:00Z",
         "version": "3.0.0",
+        "ready": sistema_listo.is_set(),
         "components": {}
     }
     
-    # Verificar BD destino
-    try:
-        from app.db import SessionLocal
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))  # ✅ CORREGIDO: usar text()
-        db.close()
-        health_status["components"]["database"] = "ok"
-    except Exception as e:
-        health_status["components"]["database"] = f"error: {str(e)}"
+    # Verificar BD destino (resultado cacheado DB_CHECK_TTL segundos)
+    estado_db = _verificar_db_destino()
+    health_status["components"]["database"] = estado_db
+    if estado_db != "ok":
         health_status["status"] = "degraded"
     
-    # Verificar DB origen (DB2)
-    try:
-        from app.db.origen_db2 import test_conexion_db2
-        if test_conexion_db2():
-            health_status["components"]["db2"] = "ok"
-        else:
-            health_status["components"]["db2"] = "error"
-    except Exception as e:
-        health_status["components"]["db2"] = f"error: {str(e)}"
+    # Ocupación de los pools (API y daemon)
+    health_status["components"]["db_pool"] = {
+        "api": _estado_pool(engine),
+        "daemon": _estado_pool(daemon_engine),
+    }
     
-    # Verificar tracking
+    # Verificar DB origen (DB2, resultado cacheado DB_CHECK_TTL segundos)
+    health_status["components"]["db2"] = _verificar_db2()
+    
+    # Verificar tracking (catálogo de páginas cacheado PAGINAS_CACHE_TTL)
     try:
-        from app.services.tracking_professional import get_paginas_activas
-        paginas = get_paginas_activas()
+        if get_paginas_activas_cached is None:
+            raise RuntimeError("módulo tracking no disponible")
+        paginas = get_paginas_activas_cached()
         health_status["components"]["tracking"] = f"ok ({len(paginas)} páginas)"
     except Exception as e:
         health_status["components"]["tracking"] = f"error: {str(e)}"
@@ -204,7 +329,8 @@ def health_check():
     
     # Verificar daemon
     try:
-        from app.services.daemon_procesador import obtener_estado_daemon
+        if obtener_estado_daemon is None:
+            raise RuntimeError("módulo daemon no disponible")
         estado = obtener_estado_daemon()
         health_status["components"]["daemon"] = "running" if estado["running"] else "stopped"
     except Exception as e:
@@ -212,10 +338,25 @@ def health_check():
     
     # Verificar scheduler de sincronización
     try:
-        from app.services.scheduler_sincronizacion import obtener_estado_scheduler
+        if obtener_estado_scheduler is None:
+            raise RuntimeError("módulo scheduler no disponible")
         estado_sync = obtener_estado_scheduler()
         health_status["components"]["scheduler"] = "running" if estado_sync["running"] else "stopped"
     except Exception as e:
         health_status["components"]["scheduler"] = f"error: {str(e)}"
     
     return health_status
+
+
+if __name__ == "__main__":
+    # Arranque local (python -m app.main) con la misma configuración que el Dockerfile
+    import sys
+    import uvicorn
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        loop="asyncio" if sys.platform == "win32" else "uvloop",  # uvloop no existe en Windows
+        http="httptools",
+        workers=1,  # daemon y scheduler viven en el proceso: no duplicar
+    )
@@ -72,16 +72,19 @@ def endpoint_detener_daemon() -> Dict[str, Any]:
 
 
 @router.get("/estado", summary="Obtener estado del daemon")
-def endpoint_estado_daemon() -> Dict[str, Any]:
+async def endpoint_estado_daemon() -> Dict[str, Any]:
     """
     Consulta el estado actual del daemon procesador.
+    Lectura sin bloqueo: se atiende en el event loop, sin pasar por el threadpool.
     
     Returns:
         {
             "running": bool - Si el daemon está ejecutándose,
             "thread_alive": bool - Si el thread del daemon está vivo,
-            "cliente_actual": str - Nombre del cliente en proceso (opcional),
-            "ultimo_inicio": str - Timestamp del último inicio (ISO format)
+            "espera_actual_s": int - Espera en curso entre ciclos (null si no hay),
+            "espera_min_s" / "espera_max_s": int - Cotas de la espera adaptativa,
+            "proximo_ciclo": str - Inicio estimado del próximo ciclo (ISO format),
+            "timestamp": str - Momento de la consulta (ISO format)
         }
     """
     try:
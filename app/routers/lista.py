@@ -1,64 +1,257 @@
 # app/routers/lista.py
 from __future__ import annotations
+import re
 from fastapi import APIRouter, Query, HTTPException
-from typing import Optional, List, Any, Dict
-from sqlalchemy import text
+from pydantic import BaseModel, Field
+from typing import Optional, List, Any, Dict, Literal
+from datetime import datetime
+from sqlalchemy import text, bindparam, select, table, column, and_, or_, Integer, String, Numeric, Date, DateTime
 from app.db import engine, SessionLocal
+from app.api.responses import ORJSONResponse
 
 router = APIRouter(prefix="/lista", tags=["lista"])
 
-def _row_to_dict(row) -> Dict[str, Any]:
-    return {
-        "id": row.id_lista,
-        "nombre": row.nombre,
-        "apellido": row.apellido,
-        "ci": row.ci,
-        "ruc": row.ruc,
-        "tipo": row.tipo,
-        "monto": float(row.monto) if row.monto is not None else None,
-        "fecha": row.fecha.isoformat() if row.fecha else None,
-        "estado": row.estado,
-        "fecha_creacion": row.fecha_creacion.isoformat() if row.fecha_creacion else None,
-        "fecha_inicio_flujo": row.fecha_inicio_flujo.isoformat() if row.fecha_inicio_flujo else None,
-        "fecha_fin_flujo": row.fecha_fin_flujo.isoformat() if row.fecha_fin_flujo else None,
-        "mensaje_error": row.mensaje_error,
-    }
+# Dialecto del engine destino: decide la sintaxis de búsqueda (ver _condicion_busqueda)
+_DIALECTO = engine.dialect.name
+
+# Tabla ligera (sin modelo ORM) para construir las consultas con Core:
+# el dialecto decide LIMIT / TOP según el motor destino
+de_lista = table(
+    "de_lista",
+    column("id_lista", Integer), column("nombre", String), column("apellido", String),
+    column("ci", String), column("ruc", String), column("tipo", String), column("monto", Numeric(asdecimal=True)),
+    column("fecha", Date), column("estado", String), column("fecha_creacion", DateTime),
+    column("fecha_inicio_flujo", DateTime), column("fecha_fin_flujo", DateTime),
+    column("mensaje_error", String),
+)
+
+
+def _condicion_busqueda(solo_documento: bool = False):
+    """
+    Búsqueda indexable en de_lista (parámetros :ft y :prefijo, ver _params_busqueda):
+    - nombre/apellido → índice FULLTEXT (MATCH ... AGAINST en MySQL, CONTAINS en SQL Server)
+    - ci/ruc → prefijo 'q%' (sin comodín inicial, usa el B-tree)
+    Con `solo_documento` (q sin términos de palabra) se omite el full-text.
+    """
+    por_documento = or_(
+        de_lista.c.ci.like(bindparam("prefijo")),
+        de_lista.c.ruc.like(bindparam("prefijo")),
+    )
+    if solo_documento:
+        return por_documento
+    if _DIALECTO == "mysql":
+        texto = text("MATCH(nombre, apellido) AGAINST (:ft IN BOOLEAN MODE)")
+    elif _DIALECTO == "mssql":
+        texto = text("CONTAINS((nombre, apellido), :ft)")
+    else:
+        texto = or_(de_lista.c.nombre.like(bindparam("ft")), de_lista.c.apellido.like(bindparam("ft")))
+    return or_(texto, por_documento)
+
+
+def _params_busqueda(q: str) -> Dict[str, Any]:
+    """
+    Valores para :ft / :prefijo según el dialecto. Sin :ft si q no deja términos
+    de palabra (MATCH/CONTAINS vacíos): solo aplica el prefijo de ci/ruc.
+    """
+    prefijo = f"{q.strip()}%"
+    if _DIALECTO not in ("mysql", "mssql"):
+        return {"ft": f"%{q.strip()}%", "prefijo": prefijo}
+    # Solo caracteres de palabra: los operadores de MATCH/CONTAINS no llegan desde el usuario
+    terminos = [t for t in (re.sub(r"[^\w]", "", p) for p in q.split()) if t]
+    if not terminos:
+        # CONTAINS(..., '""') es un error en SQL Server, no un "sin filas"
+        return {"prefijo": prefijo}
+    if _DIALECTO == "mysql":
+        ft = " ".join(f"+{t}*" for t in terminos)
+    else:
+        ft = " AND ".join(f'"{t}*"' for t in terminos)
+    return {"ft": ft, "prefijo": prefijo}
+
+
+# Bits de la máscara de filtros presentes en la request
+_F_ESTADO, _F_DESDE, _F_HASTA, _F_Q, _F_CURSOR, _F_CURSOR_NULO, _F_Q_DOC = 1, 2, 4, 8, 16, 32, 64
+
+
+def _construir_sql(mask: int):
+    """SELECT de de_lista para una combinación concreta de filtros (todo con bindparams)"""
+    condiciones = []
+    if mask & _F_ESTADO:
+        condiciones.append(de_lista.c.estado == bindparam("estado"))
+    if mask & _F_DESDE:
+        condiciones.append(de_lista.c.fecha >= bindparam("fdesde"))
+    if mask & _F_HASTA:
+        condiciones.append(de_lista.c.fecha <= bindparam("fhasta"))
+    if mask & _F_Q:
+        condiciones.append(_condicion_busqueda())
+    elif mask & _F_Q_DOC:
+        condiciones.append(_condicion_busqueda(solo_documento=True))
+    # fecha_creacion NULL ordena al final con DESC (SQL Server, MySQL y SQLite):
+    # tras las filas con fecha vienen las que no la tienen, por id_lista DESC
+    if mask & _F_CURSOR:
+        # Equivalente portable de (fecha_creacion, id_lista) < (:ts, :id) + las NULL
+        condiciones.append(or_(
+            de_lista.c.fecha_creacion < bindparam("cursor_ts", type_=DateTime),
+            and_(
+                de_lista.c.fecha_creacion == bindparam("cursor_ts", type_=DateTime),
+                de_lista.c.id_lista < bindparam("cursor_id", type_=Integer),
+            ),
+            de_lista.c.fecha_creacion.is_(None),
+        ))
+    elif mask & _F_CURSOR_NULO:
+        # El cursor ya está en la cola de filas sin fecha_creacion
+        condiciones.append(and_(
+            de_lista.c.fecha_creacion.is_(None),
+            de_lista.c.id_lista < bindparam("cursor_id", type_=Integer),
+        ))
+    return (
+        # id_lista se expone como "id" directamente desde el SELECT
+        select(de_lista.c.id_lista.label("id"), *[c for c in de_lista.c if c.name != "id_lista"])
+        .where(*condiciones)
+        .order_by(de_lista.c.fecha_creacion.desc(), de_lista.c.id_lista.desc())
+    )
+
+
+# Las variantes se construyen una sola vez al importar el módulo
+SQL_BY_MASK = {
+    mask: _construir_sql(mask)
+    for mask in range(128)
+    # pares excluyentes
+    if not (mask & _F_CURSOR and mask & _F_CURSOR_NULO) and not (mask & _F_Q and mask & _F_Q_DOC)
+}
+
+
+def _encode_cursor(row) -> str:
+    """
+    Cursor keyset: '<fecha_creacion ISO>|<id_lista>' de la última fila devuelta
+    ('|<id_lista>' si esa fila no tiene fecha_creacion).
+    """
+    ts = row.fecha_creacion.isoformat() if row.fecha_creacion is not None else ""
+    return f"{ts}|{row.id}"
+
+
+def _decode_cursor(cursor: str):
+    """(fecha_creacion o None, id_lista) del cursor"""
+    try:
+        ts, id_lista = cursor.rsplit("|", 1)
+        return (datetime.fromisoformat(ts) if ts else None), int(id_lista)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
 
 @router.get("")
 def list_lista(
     estado: Optional[str] = Query(None, description="Pendiente|Procesando|Procesado|Error"),
     fecha_desde: Optional[str] = Query(None, description="YYYY-MM-DD"),
     fecha_hasta: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    q: Optional[str] = Query(None, description="Busca en nombre, apellido, ci, ruc"),
-) -> List[Dict[str, Any]]:
+    q: Optional[str] = Query(None, description="Busca en nombre, apellido (full-text) y prefijo de ci, ruc"),
+    limit: int = Query(100, ge=1, le=500, description="Máximo de registros por página"),
+    cursor: Optional[str] = Query(None, description="next_cursor devuelto por la página anterior"),
+) -> ORJSONResponse:
     """
     Lista registros de `de_lista` con filtros básicos.
+    Paginación keyset sobre (fecha_creacion DESC, id_lista DESC): el costo de
+    cada página no depende de cuántas páginas se hayan recorrido antes.
     """
+    mask = 0
+    params: Dict[str, Any] = {}
+    if estado:
+        mask |= _F_ESTADO
+        params["estado"] = estado
+    if fecha_desde:
+        mask |= _F_DESDE
+        params["fdesde"] = fecha_desde
+    if fecha_hasta:
+        mask |= _F_HASTA
+        params["fhasta"] = fecha_hasta
+    if q and q.strip():
+        busqueda = _params_busqueda(q)
+        mask |= _F_Q if "ft" in busqueda else _F_Q_DOC
+        params.update(busqueda)
+    if cursor:
+        cursor_ts, params["cursor_id"] = _decode_cursor(cursor)
+        if cursor_ts is None:
+            mask |= _F_CURSOR_NULO
+        else:
+            mask |= _F_CURSOR
+            params["cursor_ts"] = cursor_ts
+
+    # .limit() es generativo y barato; SQLAlchemy lo cachea como parámetro (TOP/LIMIT según dialecto)
+    stmt = SQL_BY_MASK[mask].limit(limit + 1)  # +1 para saber si existe una página siguiente
+
+    items: List[Dict[str, Any]] = []
+    next_cursor: Optional[str] = None
     with engine.connect() as conn:
-        where = ["1=1"]
-        params: Dict[str, Any] = {}
-        if estado:
-            where.append("estado = :estado")
-            params["estado"] = estado
-        if fecha_desde:
-            where.append("fecha >= :fdesde")
-            params["fdesde"] = fecha_desde
-        if fecha_hasta:
-            where.append("fecha <= :fhasta")
-            params["fhasta"] = fecha_hasta
-        if q:
-            where.append("(nombre LIKE :q OR apellido LIKE :q OR ci LIKE :q OR ruc LIKE :q)")
-            params["q"] = f"%{q}%"
-
-        sql = text(f"""
-            SELECT id_lista, nombre, apellido, ci, ruc, tipo, monto, fecha,
-                   estado, fecha_creacion, fecha_inicio_flujo, fecha_fin_flujo, mensaje_error
-            FROM de_lista
-            WHERE {" AND ".join(where)}
-            ORDER BY fecha_creacion DESC, id_lista DESC
-        """)
-        rows = conn.execute(sql, params).mappings().all()
-        return [_row_to_dict(r) for r in rows]
+        result = conn.execution_options(stream_results=True).execute(stmt, params)
+        for row in result:
+            if len(items) == limit:
+                next_cursor = _encode_cursor(ultima)
+                break
+            items.append(row._mapping)
+            ultima = row
+        result.close()
+
+    # Las filas van tal cual a orjson (datetime/date nativos, Decimal → número)
+    return ORJSONResponse({"items": items, "next_cursor": next_cursor})
+
+ESTADOS_VALIDOS = {"Pendiente", "Procesando", "Procesado", "Error"}
+
+
+class EstadoItem(BaseModel):
+    """Item de PUT /lista/estado/batch: FastAPI rechaza (422) los inválidos antes de abrir la transacción"""
+    id: int = Field(..., description="id_lista del registro")
+    estado: Literal["Pendiente", "Procesando", "Procesado", "Error"]
+    mensaje_error: Optional[str] = Field(None, description="Solo se guarda con estado 'Error'")
+
+
+def _set_campos_estado(estado: str) -> List[str]:
+    """Columnas a actualizar según el estado destino (marcas de tiempo incluidas)"""
+    set_campos = ["estado = :estado"]
+    if estado == "Procesando":
+        set_campos.append("fecha_inicio_flujo = CURRENT_TIMESTAMP")
+        set_campos.append("mensaje_error = NULL")
+    elif estado == "Procesado":
+        set_campos.append("fecha_fin_flujo = CURRENT_TIMESTAMP")
+        set_campos.append("mensaje_error = NULL")
+    elif estado == "Error":
+        set_campos.append("fecha_fin_flujo = CURRENT_TIMESTAMP")
+        set_campos.append("mensaje_error = :mensaje_error")
+    return set_campos
+
+
+@router.put("/estado/batch")
+def update_estado_batch(payload: List[EstadoItem]) -> Dict[str, Any]:
+    """
+    Actualiza el estado de varios registros en una sola transacción.
+    Body ejemplo:
+    [ {"id": 1, "estado": "Procesando"}, {"id": 2, "estado": "Error", "mensaje_error": "..."} ]
+
+    Se emite un UPDATE ... WHERE id_lista IN (...) por cada estado distinto
+    (los 'Error' van fila a fila por su mensaje individual).
+    """
+    por_estado: Dict[str, List[EstadoItem]] = {}
+    for item in payload:
+        por_estado.setdefault(item.estado, []).append(item)
+
+    actualizados = 0
+    with engine.begin() as conn:
+        for estado, items in por_estado.items():
+            set_sql = ", ".join(_set_campos_estado(estado))
+            if estado == "Error":
+                # Un execute por fila: en un executemany el rowcount no es fiable
+                sql = text(f"UPDATE de_lista SET {set_sql} WHERE id_lista = :id")
+                for i in items:
+                    res = conn.execute(
+                        sql, {"estado": estado, "id": i.id, "mensaje_error": (i.mensaje_error or "")[:1024]}
+                    )
+                    actualizados += max(res.rowcount, 0)
+            else:
+                sql = text(f"UPDATE de_lista SET {set_sql} WHERE id_lista IN :ids").bindparams(
+                    bindparam("ids", expanding=True)
+                )
+                res = conn.execute(sql, {"estado": estado, "ids": [i.id for i in items]})
+                actualizados += max(res.rowcount, 0)
+
+    return {"ok": True, "actualizados": actualizados}
+
 
 @router.put("/{id_lista}/estado")
 def update_estado(
@@ -71,25 +264,15 @@ def update_estado(
     { "estado":"Procesando", "mensaje_error":null }
     """
     estado = (payload.get("estado") or "").strip()
-    if estado not in {"Pendiente", "Procesando", "Procesado", "Error"}:
+    if estado not in ESTADOS_VALIDOS:
         raise HTTPException(status_code=400, detail="Estado inválido.")
 
-    set_campos = ["estado = :estado"]
     params: Dict[str, Any] = {"estado": estado, "id": id_lista}
-
-    if estado == "Procesando":
-        set_campos.append("fecha_inicio_flujo = CURRENT_TIMESTAMP")
-        set_campos.append("mensaje_error = NULL")
-    elif estado == "Procesado":
-        set_campos.append("fecha_fin_flujo = CURRENT_TIMESTAMP")
-        set_campos.append("mensaje_error = NULL")
-    elif estado == "Error":
-        set_campos.append("fecha_fin_flujo = CURRENT_TIMESTAMP")
+    if estado == "Error":
         msg = payload.get("mensaje_error")
         params["mensaje_error"] = (msg or "")[:1024]
-        set_campos.append("mensaje_error = :mensaje_error")
 
-    sql = text(f"UPDATE de_lista SET {', '.join(set_campos)} WHERE id_lista = :id")
+    sql = text(f"UPDATE de_lista SET {', '.join(_set_campos_estado(estado))} WHERE id_lista = :id")
     with engine.begin() as conn:
         res = conn.execute(sql, params)
         if res.rowcount == 0:
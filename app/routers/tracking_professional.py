@@ -6,15 +6,24 @@ Router para sistema de tracking actualizado a usar de_clientes_rpa_v2
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import datetime, date
+import asyncio
+import os
+import stat
 
 from app.services.tracking_professional import (
-    get_paginas_activas,
+    get_paginas_activas_cached,
     get_clientes_with_filters,
     update_cliente_estado,
     crear_proceso_completo,
-    get_estadisticas
+    get_estadisticas,
+    get_proceso_by_job_id,
+    refrescar_cache_paginas,
+    listar_reportes_tracking,
+    obtener_reportes_cliente,
+    get_reporte_para_descarga
 )
+from app.api.responses import DocxFileResponse, ORJSONResponse
 
 router = APIRouter(prefix="/tracking", tags=["tracking"])
 
@@ -36,7 +45,7 @@ class CrearProcesoRequest(BaseModel):
 def health_check() -> Dict[str, Any]:
     """Health check para verificar que el sistema de tracking funciona"""
     try:
-        paginas = get_paginas_activas()
+        paginas = get_paginas_activas_cached()
         
         return {
             "status": "healthy",
@@ -49,24 +58,43 @@ def health_check() -> Dict[str, Any]:
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Sistema no saludable: {str(e)}")
 
-@router.get("/paginas", summary="Listar páginas disponibles")
+# Los listados devuelven dicts construidos por el servicio (datos internos ya
+# validados): response_model=None evita que FastAPI revalide cada fila con
+# Pydantic contra la anotación de retorno (igual en /clientes, /procesos, /reportes).
+@router.get("/paginas", summary="Listar páginas disponibles", response_model=None)
 def listar_paginas_disponibles() -> List[Dict[str, Any]]:
     """
     Obtiene todas las páginas activas disponibles para consulta.
     Se usa para mostrar los checkboxes en el frontend.
     """
     try:
-        return get_paginas_activas()
+        return get_paginas_activas_cached()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo páginas: {str(e)}")
 
+@router.post("/paginas/refresh", summary="Recargar catálogo de páginas en memoria")
+def refrescar_paginas() -> Dict[str, Any]:
+    """
+    Invalida el catálogo de páginas cacheado en el proceso.
+    Usar después de activar/desactivar o crear páginas en de_paginas_rpa.
+    """
+    try:
+        total = refrescar_cache_paginas()
+        return {
+            "success": True,
+            "paginas_activas": total,
+            "message": "Catálogo de páginas recargado"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error recargando páginas: {str(e)}")
+
 # ===== ENDPOINT PRINCIPAL DE CLIENTES =====
 
-@router.get("/clientes", summary="Listar clientes de de_clientes_rpa_v2 con filtros")
+@router.get("/clientes", summary="Listar clientes de de_clientes_rpa_v2 con filtros", response_model=None)
 def listar_clientes_con_filtros(
     estado: Optional[str] = Query(None, description="Filtrar por ESTADO_CONSULTA (Pendiente, En_Proceso, Procesado, Error)"),
-    fecha_desde: Optional[str] = Query(None, description="Fecha desde (YYYY-MM-DD)"),
-    fecha_hasta: Optional[str] = Query(None, description="Fecha hasta (YYYY-MM-DD)"),
+    fecha_desde: Optional[date] = Query(None, description="Fecha desde (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha hasta (YYYY-MM-DD)"),
     q: Optional[str] = Query(None, description="Búsqueda en NOMBRES_CLIENTE, APELLIDOS_CLIENTE, CEDULA")
 ) -> List[Dict[str, Any]]:
     """
@@ -155,12 +183,98 @@ def crear_proceso(request: CrearProcesoRequest) -> Dict[str, Any]:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creando proceso: {str(e)}")
 
+@router.get("/procesos/{job_id}", summary="Detalle de un proceso con sus consultas", response_model=None)
+def obtener_proceso(job_id: str) -> Dict[str, Any]:
+    """
+    Obtiene un proceso por job_id junto con el estado de cada consulta.
+    """
+    try:
+        proceso = get_proceso_by_job_id(job_id)
+        
+        if not proceso:
+            raise HTTPException(status_code=404, detail="Proceso no encontrado")
+        
+        return proceso
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo proceso: {str(e)}")
+
+# ===== ENDPOINTS DE REPORTES =====
+
+@router.get("/reportes", summary="Listar reportes generados (paginado)", response_model=None)
+def listar_reportes(
+    tipo_alerta: Optional[str] = Query(None, description="Filtrar por tipo de alerta"),
+    limit: int = Query(50, ge=1, le=500, description="Máximo de reportes por página"),
+    cursor: Optional[str] = Query(None, description="next_cursor devuelto por la página anterior")
+) -> ORJSONResponse:
+    """
+    Lista los reportes de de_reportes_rpa (más recientes primero) con cédula,
+    nombres y apellidos del cliente.
+    
+    Respuesta: {"items": [...], "next_cursor": "..." | null}
+    """
+    try:
+        # ORJSONResponse directa: sin pasar por jsonable_encoder (datetime nativo en orjson)
+        return ORJSONResponse(listar_reportes_tracking(tipo_alerta=tipo_alerta, limit=limit, cursor=cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo reportes: {str(e)}")
+
+def _stat_archivo(ruta: str) -> Optional[os.stat_result]:
+    """stat del archivo si existe y es regular; None en otro caso"""
+    try:
+        info = os.stat(ruta)
+    except OSError:
+        return None
+    return info if stat.S_ISREG(info.st_mode) else None
+
+@router.get("/reportes/{proceso_id}/download", summary="Descargar reporte DOCX de un proceso")
+async def descargar_reporte_proceso(proceso_id: int):
+    """
+    Descarga el último reporte DOCX generado para el proceso.
+    Se envía en streaming desde disco (bloques de 1 MiB) con Content-Length.
+    
+    La consulta a BD y el stat van a hilos de trabajo (asyncio.to_thread);
+    el envío del archivo lo hace FileResponse de forma asíncrona.
+    """
+    try:
+        reporte = await asyncio.to_thread(get_reporte_para_descarga, proceso_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo reporte: {str(e)}")
+    
+    if not reporte:
+        raise HTTPException(status_code=404, detail="Reporte no encontrado para ese proceso")
+    
+    # Un único stat: comprueba existencia y se reutiliza para Content-Length/ETag
+    ruta = reporte["ruta_archivo"]
+    info = await asyncio.to_thread(_stat_archivo, ruta)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Archivo no encontrado en disco")
+    
+    return DocxFileResponse(
+        ruta,
+        filename=reporte["nombre_archivo"] or os.path.basename(ruta),
+        stat_result=info
+    )
+
+@router.get("/clientes/{cliente_id}/reportes", summary="Reportes de un cliente", response_model=None)
+def listar_reportes_cliente(cliente_id: int) -> ORJSONResponse:
+    """
+    Lista los reportes de un cliente junto con job_id y estado de su proceso.
+    """
+    try:
+        return ORJSONResponse(obtener_reportes_cliente(cliente_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error obteniendo reportes del cliente: {str(e)}")
+
 # ===== ENDPOINT DE ESTADÍSTICAS =====
 
 @router.get("/estadisticas", summary="Obtener estadísticas del sistema")
 def obtener_estadisticas(
-    fecha_desde: Optional[str] = Query(None, description="Fecha desde (YYYY-MM-DD)"),
-    fecha_hasta: Optional[str] = Query(None, description="Fecha hasta (YYYY-MM-DD)")
+    fecha_desde: Optional[date] = Query(None, description="Fecha desde (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha hasta (YYYY-MM-DD)")
 ) -> Dict[str, Any]:
     """
     Obtiene estadísticas del sistema incluyendo:
@@ -10,211 +10,488 @@ Daemon con lógica inteligente - GENERAR REPORTE EN 4 CASOS:
 ❌ Error real = Resetear a Pendiente
 """
 
+import itertools
 import threading
 import time
-from typing import Optional
-from datetime import datetime
-import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
 import os
-import traceback
 
-from app.db import SessionLocal
+from sqlalchemy import bindparam, func, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.db import DaemonSessionLocal, daemon_engine
 from app.db.models import DeClienteV2
 from app.db.models_new import DeProceso, DeReporte
 
 # ✅ IMPORTACIONES CORRECTAS
-from flows.funcion_judicial import process_funcion_judicial_once
+from flows.funcion_judicial import FuncionJudicialSession
 from app.services.report_builder import build_report_docx
 from app.services.fj_httpx_fallback import generar_reporte_httpx
+from core.utils.log import get_logger
 from app.services.detectores_consulta import (
     detectar_sin_procesos_judiciales_scraping,
     verificar_httpx_sin_procesos_judiciales,
     crear_rastreo_sin_resultados
 )
 
+# El worker no espera por stdout/journald: log() solo encola
+_logger = get_logger("daemon")
+
 # ===== ESTADO GLOBAL =====
 daemon_thread = None
 daemon_running = False
 daemon_lock = threading.Lock()
+# Segundos que iniciar_daemon espera a que termine el loop anterior
+ESPERA_JOIN_ANTERIOR = 5
+
+# Espera en curso entre ciclos (segundos) y cuándo termina, para /daemon/estado
+espera_actual: Optional[int] = None
+proximo_ciclo: Optional[datetime] = None
+
+# Clientes reclamados y consultados en paralelo por ciclo (un navegador
+# headless por worker). Cada worker usa sesiones cortas: el pool de
+# daemon_engine (DB_DAEMON_POOL_*, 2+2 por defecto) cubre hasta 4 workers.
+DAEMON_WORKERS = max(1, int(os.getenv("DAEMON_WORKERS", "1")))
+# Clientes reclamados por ciclo (nunca menos que los workers): con un lote
+# mayor el ciclo los procesa seguidos antes de esperar. Los reclamados quedan
+# en 'Procesando' hasta su turno, así que conviene un lote pequeño.
+DAEMON_LOTE = max(DAEMON_WORKERS, int(os.getenv("DAEMON_LOTE", str(DAEMON_WORKERS))))
+
+# Un navegador por worker del executor, reutilizado entre clientes y ciclos
+# (Chrome arranca una vez por worker); se cierran al detener el daemon
+_navegador_local = threading.local()
+_navegadores: List[FuncionJudicialSession] = []
+_navegadores_lock = threading.Lock()
+
+# Resultados de scraping por nombre normalizado (la búsqueda es solo por nombre:
+# homónimos y reintentos no repiten el navegador). Los "sin resultados" caducan
+# antes para no fijar un vacío; errores (None) no se guardan.
+SCRAPING_CACHE_TTL = 3600  # segundos
+SCRAPING_CACHE_TTL_SIN_RESULTADOS = 300
+SCRAPING_CACHE_MAX = 512
+_scraping_cache: Dict[str, Tuple[float, dict]] = {}
+_scraping_cache_lock = threading.Lock()
+
+# 'Pendiente' como literal en el SQL (no parámetro): SQL Server solo usa el
+# índice filtrado ix_de_clientes_rpa_v2_pendientes si ve el valor del filtro
+_ESTADO_PENDIENTE = bindparam("estado_pendiente", "Pendiente", literal_execute=True)
+
+# Secuencia de job_id del proceso (next() sobre itertools.count es atómico con el GIL)
+_JOB_SEQ = itertools.count()
+
+# Backoff de clientes que fallan: 30 min, 1 h, 2 h... hasta 24 h entre intentos,
+# así un cliente que siempre falla no acapara los ciclos frente a los nuevos
+REINTENTO_BASE = timedelta(minutes=30)
+REINTENTO_MAX = timedelta(hours=24)
+
+# Espera entre ciclos según la cola de pendientes listos (ver _espera_siguiente_ciclo)
+ESPERA_CON_COLA = 60           # > COLA_GRANDE pendientes
+ESPERA_COLA_PEQUENA = 5 * 60   # 1..COLA_GRANDE pendientes
+ESPERA_SIN_PENDIENTES = 30 * 60  # tope del backoff con la cola vacía
+COLA_GRANDE = 10
+# Cola vacía: 10 s, 15 s, 22 s... (x1.5 por ciclo vacío) hasta ESPERA_SIN_PENDIENTES;
+# un cliente recién insertado se atiende en segundos y un daemon ocioso converge a 30 min
+ESPERA_MINIMA_SIN_PENDIENTES = 10
+ESPERA_FACTOR_BACKOFF = 1.5
+
+# detener_daemon() lo activa: corta al instante la espera entre ciclos
+daemon_stop = threading.Event()
+
+# Se activa cuando termina la inicialización en segundo plano del startup
+# (verificación DB2 + scheduler). El daemon no toma clientes antes de eso.
+sistema_listo = threading.Event()
+
+# Únicas columnas del cliente que usa el daemon (nombre para la consulta +
+# encabezado del reporte): se leen como Row, sin hidratar la entidad completa
+_COLUMNAS_CLIENTE = (
+    DeClienteV2.id,
+    DeClienteV2.APELLIDOS_CLIENTE,
+    DeClienteV2.NOMBRES_CLIENTE,
+    DeClienteV2.CEDULA,
+    DeClienteV2.NOMBRES_CONYUGE,
+    DeClienteV2.CEDULA_CONYUGE,
+    DeClienteV2.NOMBRES_CODEUDOR,
+    DeClienteV2.CEDULA_CODEUDOR,
+)
+
+
+def log(msg: str, *args):
+    """
+    Encola el mensaje con formato perezoso (%s): los argumentos solo se
+    interpolan si el nivel INFO está activo; el QueueListener escribe en stdout.
+    """
+    _logger.info("[DAEMON] " + msg, *args)
 
 
-def log(msg: str):
-    """Logging con timestamp"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    print(f"[DAEMON {timestamp}] {msg}")
+def log_debug(msg: str, *args):
+    """Como log() pero a nivel DEBUG: silenciable en producción sin coste de formato"""
+    _logger.debug("[DAEMON] " + msg, *args)
 
 
-def _actualizar_cliente_estado(cliente_id: int, estado: str):
-    """Actualiza ESTADO_CONSULTA del cliente"""
-    db = SessionLocal()
+def _actualizar_cliente_estado(cliente_id: int, estado: str, db: Optional[Session] = None):
+    """
+    Actualiza ESTADO_CONSULTA del cliente con un UPDATE directo (sin SELECT previo).
+    Con `db` se usa la sesión del llamador (que hace el commit); sin ella abre y confirma la suya.
+    """
+    if db is not None:
+        resultado = db.execute(
+            update(DeClienteV2)
+            .where(DeClienteV2.id == cliente_id)
+            .values(ESTADO_CONSULTA=estado)
+        )
+        if resultado.rowcount == 0:
+            log("⚠️ Cliente %s no encontrado al pasar a %s", cliente_id, estado)
+        return
+    
+    db = DaemonSessionLocal()
     try:
-        cliente = db.query(DeClienteV2).filter(DeClienteV2.id == cliente_id).first()
-        if cliente:
-            cliente.ESTADO_CONSULTA = estado
-            cliente.FECHA_ULTIMA_CONSULTA = datetime.now()
-            db.commit()
-            log(f"✅ Cliente {cliente_id} → {estado}")
+        _actualizar_cliente_estado(cliente_id, estado, db=db)
+        db.commit()
+        log("✅ Cliente %s → %s", cliente_id, estado)
     except Exception as e:
-        log(f"❌ Error actualizando cliente: {e}")
+        log("❌ Error actualizando cliente: %s", e)
         db.rollback()
     finally:
         db.close()
 
 
-def _crear_proceso(cliente_id: int) -> Optional[int]:
-    """Crea registro en de_procesos_rpa"""
-    db = SessionLocal()
-    try:
-        job_id = f"daemon_{uuid.uuid4().hex[:12]}"
-        
-        proceso = DeProceso(
+def _nuevo_job_id() -> str:
+    """
+    job_id único y ordenable sin syscalls: PID + contador del proceso + segundo
+    de creación (el segundo evita choques si el PID se reutiliza tras reiniciar).
+    """
+    return f"daemon_{os.getpid():x}_{next(_JOB_SEQ):08x}_{int(time.time()):08x}"
+
+
+def _crear_procesos(db: Session, cliente_ids: List[int]) -> List[Tuple[int, str]]:
+    """
+    Agrega los registros en de_procesos_rpa a la sesión del llamador con un
+    solo flush (sin commit). Retorna (proceso_id, job_id) alineados con `cliente_ids`.
+    fecha_creacion la pone el servidor (server_default).
+    """
+    procesos = [
+        DeProceso(
             cliente_id=cliente_id,
-            job_id=job_id,
+            job_id=_nuevo_job_id(),
             estado='Pendiente',
-            fecha_creacion=datetime.now(),
             headless=True,
             generate_report=True,
             total_paginas_solicitadas=1
         )
-        db.add(proceso)
-        db.commit()
+        for cliente_id in cliente_ids
+    ]
+    db.add_all(procesos)
+    db.flush()
+    
+    for proceso in procesos:
+        log("✅ Proceso %s creado (Job: %s)", proceso.id, proceso.job_id)
+    return [(proceso.id, proceso.job_id) for proceso in procesos]
+
+
+def _navegador_del_worker() -> FuncionJudicialSession:
+    """Sesión de navegador del hilo actual (se crea en el primer uso)"""
+    sesion = getattr(_navegador_local, "sesion", None)
+    if sesion is None:
+        sesion = FuncionJudicialSession(headless=True)
+        _navegador_local.sesion = sesion
+        with _navegadores_lock:
+            _navegadores.append(sesion)
+    return sesion
+
+
+def _cerrar_navegadores():
+    """Cierra los navegadores de todos los workers (con el executor ya terminado)"""
+    with _navegadores_lock:
+        sesiones = list(_navegadores)
+        _navegadores.clear()
+    for sesion in sesiones:
+        sesion.close()
+
+
+def _consultar_funcion_judicial(nombres: str) -> Optional[dict]:
+    """Scraping de Función Judicial con caché TTL por nombre normalizado"""
+    clave = " ".join(nombres.upper().split())
+    ahora = time.monotonic()
+    
+    with _scraping_cache_lock:
+        entrada = _scraping_cache.get(clave)
+        if entrada and entrada[0] > ahora:
+            log_debug("♻️ Resultado de scraping en caché para: %s", nombres)
+            return entrada[1]
+    
+    resultado = _navegador_del_worker().run(nombres)
+    
+    if isinstance(resultado, dict):
+        scenario = resultado.get('scenario')
+        if scenario == 'results_found':
+            ttl = SCRAPING_CACHE_TTL
+        elif scenario == 'no_results':
+            ttl = SCRAPING_CACHE_TTL_SIN_RESULTADOS
+        else:
+            return resultado
         
-        log(f"✅ Proceso {proceso.id} creado (Job: {job_id})")
-        return proceso.id
-    except Exception as e:
-        log(f"❌ Error creando proceso: {e}")
-        db.rollback()
-        return None
-    finally:
-        db.close()
+        with _scraping_cache_lock:
+            _scraping_cache[clave] = (time.monotonic() + ttl, resultado)
+            # Tope de tamaño: se descarta la entrada más antigua (orden de inserción)
+            while len(_scraping_cache) > SCRAPING_CACHE_MAX:
+                del _scraping_cache[next(iter(_scraping_cache))]
+    return resultado
 
 
-def _obtener_job_id(proceso_id: int) -> str:
-    """Obtiene job_id de un proceso"""
-    db = SessionLocal()
-    try:
-        proceso = db.query(DeProceso).filter(DeProceso.id == proceso_id).first()
-        return proceso.job_id if proceso else f"daemon_{uuid.uuid4().hex[:12]}"
-    finally:
-        db.close()
-
-
-def _obtener_cliente_datos(cliente_id: int) -> dict:
-    """Obtiene datos del cliente para el reporte"""
-    db = SessionLocal()
-    try:
-        cliente = db.query(DeClienteV2).filter(DeClienteV2.id == cliente_id).first()
-        
-        if not cliente:
-            return {
-                'cliente_nombre': 'N/A',
-                'cliente_cedula': 'N/A',
-                'nombre_conyuge': 'No aplica',
-                'cedula_conyuge': 'No aplica',
-                'nombre_codeudor': 'No aplica',
-                'cedula_codeudor': 'No aplica',
-                'cliente_id': cliente_id,
-            }
-        
-        return {
-            'cliente_nombre': f"{cliente.APELLIDOS_CLIENTE} {cliente.NOMBRES_CLIENTE}".strip(),
-            'cliente_cedula': cliente.CEDULA or 'N/A',
-            'nombre_conyuge': cliente.NOMBRES_CONYUGE or 'No aplica',
-            'cedula_conyuge': cliente.CEDULA_CONYUGE or 'No aplica',
-            'nombre_codeudor': cliente.NOMBRES_CODEUDOR or 'No aplica',
-            'cedula_codeudor': cliente.CEDULA_CODEUDOR or 'No aplica',
-            'cliente_id': cliente_id,
-        }
-    except Exception as e:
-        log(f"⚠️ Error obteniendo datos cliente: {e}")
-        return {
-            'cliente_nombre': 'N/A',
-            'cliente_cedula': 'N/A',
-            'nombre_conyuge': 'No aplica',
-            'cedula_conyuge': 'No aplica',
-            'nombre_codeudor': 'No aplica',
-            'cedula_codeudor': 'No aplica',
-            'cliente_id': cliente_id,
-        }
-    finally:
-        db.close()
+def _datos_cliente_para_reporte(cliente: Row) -> dict:
+    """Datos del cliente para el reporte (de la fila leída al reclamarlo, sin consultar BD)"""
+    return {
+        'cliente_nombre': f"{cliente.APELLIDOS_CLIENTE} {cliente.NOMBRES_CLIENTE}".strip(),
+        'cliente_cedula': cliente.CEDULA or 'N/A',
+        'nombre_conyuge': cliente.NOMBRES_CONYUGE or 'No aplica',
+        'cedula_conyuge': cliente.CEDULA_CONYUGE or 'No aplica',
+        'nombre_codeudor': cliente.NOMBRES_CODEUDOR or 'No aplica',
+        'cedula_codeudor': cliente.CEDULA_CODEUDOR or 'No aplica',
+        'cliente_id': cliente.id,
+    }
 
 
 def _guardar_reporte_en_bd(
+    db: Session,
     cliente_id: int,
     proceso_id: int,
     job_id: str,
-    nombres: str,
     ruta_reporte: str,
+    tamano_bytes: int,
     tipo_alerta: str
+) -> DeReporte:
+    """
+    Agrega el reporte a de_reportes_rpa en la sesión del llamador (sin commit).
+    El tamaño lo informa quien escribió el DOCX: sin stat() sobre el volumen de reportes.
+    fecha_generacion la pone el servidor (server_default).
+    """
+    nombre_archivo = os.path.basename(ruta_reporte)
+    
+    reporte = DeReporte(
+        proceso_id=proceso_id,
+        cliente_id=cliente_id,
+        job_id=job_id,
+        nombre_archivo=nombre_archivo,
+        ruta_archivo=ruta_reporte,
+        tipo_archivo='DOCX',
+        generado_exitosamente=True,
+        tamano_bytes=tamano_bytes,
+        tipo_alerta=tipo_alerta
+    )
+    db.add(reporte)
+    return reporte
+
+
+def _actualizar_proceso(db: Session, proceso_id: int, estado: str, exitoso: bool = True):
+    """
+    Actualiza estado del proceso con un UPDATE directo en la sesión del llamador
+    (sin SELECT previo ni carga de relaciones; sin commit).
+    """
+    valores = {
+        "estado": estado,
+        # Reloj del servidor, el mismo que fijó fecha_creacion
+        "fecha_fin": func.now(),
+    }
+    if exitoso:
+        valores["total_paginas_exitosas"] = 1
+    db.execute(update(DeProceso).where(DeProceso.id == proceso_id).values(**valores))
+
+
+def _registrar_exito(
+    cliente_id: int,
+    proceso_id: int,
+    job_id: str,
+    ruta_reporte: str,
+    tamano_bytes: int,
+    tipo_alerta: str,
+    completar_sin_reporte: bool = True
 ) -> bool:
-    """Guarda reporte en de_reportes_rpa"""
-    db = SessionLocal()
-    try:
-        tamano = os.path.getsize(ruta_reporte) if os.path.exists(ruta_reporte) else 0
-        nombre_archivo = os.path.basename(ruta_reporte)
-        
-        reporte = DeReporte(
-            proceso_id=proceso_id,
-            cliente_id=cliente_id,
-            job_id=job_id,
-            nombre_archivo=nombre_archivo,
-            ruta_archivo=ruta_reporte,
-            tipo_archivo='DOCX',
-            generado_exitosamente=True,
-            tamano_bytes=tamano,
-            tipo_alerta=tipo_alerta,
-            fecha_generacion=datetime.now()
-        )
+    """
+    Cierre de un cliente procesado en UNA transacción:
+    reporte en de_reportes_rpa + proceso 'Completado' + cliente 'Procesado'.
+
+    Si falla el guardado del reporte y `completar_sin_reporte`, se completan
+    proceso y cliente sin el reporte (el archivo ya existe en disco), en la
+    misma sesión tras el rollback: una sola sesión por cliente en ambos caminos.
+    """
+    with DaemonSessionLocal() as db:
+        try:
+            reporte = _guardar_reporte_en_bd(
+                db, cliente_id, proceso_id, job_id, ruta_reporte, tamano_bytes, tipo_alerta
+            )
+            _actualizar_proceso(db, proceso_id, 'Completado', exitoso=True)
+            _actualizar_cliente_estado(cliente_id, 'Procesado', db=db)
+            db.commit()
+            log("✅ Reporte guardado en BD (ID: %s)", reporte.id)
+            return True
+        except Exception as e:
+            db.rollback()
+            log("❌ Error guardando reporte: %s", e)
         
-        db.add(reporte)
+        if not completar_sin_reporte:
+            log("⚠️ Reporte generado pero no guardado en BD")
+            return False
+        return _registrar_exito_sin_reporte(cliente_id, proceso_id, db=db)
+
+
+def _registrar_exito_sin_reporte(cliente_id: int, proceso_id: int, db: Optional[Session] = None) -> bool:
+    """
+    Proceso 'Completado' + cliente 'Procesado' en UNA transacción, sin reporte en BD.
+    Con `db` reutiliza la sesión del llamador; sin ella abre la suya.
+    """
+    if db is None:
+        with DaemonSessionLocal() as db:
+            return _registrar_exito_sin_reporte(cliente_id, proceso_id, db=db)
+    
+    try:
+        _actualizar_proceso(db, proceso_id, 'Completado', exitoso=True)
+        _actualizar_cliente_estado(cliente_id, 'Procesado', db=db)
         db.commit()
-        
-        log(f"✅ Reporte guardado en BD (ID: {reporte.id})")
         return True
     except Exception as e:
-        log(f"❌ Error guardando reporte: {e}")
+        log("❌ Error actualizando proceso: %s", e)
         db.rollback()
         return False
-    finally:
-        db.close()
 
 
-def _actualizar_proceso(proceso_id: int, estado: str, exitoso: bool = True):
-    """Actualiza estado del proceso"""
-    db = SessionLocal()
+def _programar_reintento(db: Session, cliente_id: int) -> Optional[datetime]:
+    """
+    Cliente de vuelta a 'Pendiente': suma un intento fallido y fija
+    PROXIMO_REINTENTO con backoff exponencial (sin commit).
+    """
+    cliente = db.get(DeClienteV2, cliente_id)
+    if not cliente:
+        return None
+    cliente.ESTADO_CONSULTA = 'Pendiente'
+    cliente.INTENTOS_CONSULTA = (cliente.INTENTOS_CONSULTA or 0) + 1
+    espera = min(REINTENTO_BASE * 2 ** (cliente.INTENTOS_CONSULTA - 1), REINTENTO_MAX)
+    cliente.PROXIMO_REINTENTO = (datetime.now() + espera).replace(microsecond=0)
+    return cliente.PROXIMO_REINTENTO
+
+
+def _registrar_fallo(cliente_id: int, proceso_id: int, estado_proceso: Optional[str]):
+    """
+    Error real: cliente de vuelta a 'Pendiente' (con su próximo reintento) y,
+    si se indica, proceso al estado de error; todo en UNA transacción.
+    """
+    db = DaemonSessionLocal()
     try:
-        proceso = db.query(DeProceso).filter(DeProceso.id == proceso_id).first()
-        if proceso:
-            proceso.estado = estado
-            proceso.fecha_fin = datetime.now()
-            if exitoso:
-                proceso.total_paginas_exitosas = 1
-            db.commit()
+        proximo = _programar_reintento(db, cliente_id)
+        if estado_proceso:
+            _actualizar_proceso(db, proceso_id, estado_proceso, exitoso=False)
+        db.commit()
+        log("✅ Cliente %s → Pendiente (próximo reintento: %s)", cliente_id, proximo)
     except Exception as e:
-        log(f"❌ Error actualizando proceso: {e}")
+        log("❌ Error registrando fallo: %s", e)
         db.rollback()
     finally:
         db.close()
 
 
-def _obtener_cliente_pendiente():
-    """Obtiene siguiente cliente pendiente"""
-    db = SessionLocal()
+# Sentencias de la cola construidas una sola vez al importar: cada ciclo reutiliza
+# el mismo objeto y SQLAlchemy sirve la compilación desde su caché. La hora de
+# corte de los reintentos viaja como bindparam (:ahora).
+# Pendientes listos: sin reintento por delante (PROXIMO_REINTENTO vencido o nulo)
+_FILTRO_PENDIENTES_LISTOS = (
+    DeClienteV2.ESTADO_CONSULTA == _ESTADO_PENDIENTE,
+    or_(
+        DeClienteV2.PROXIMO_REINTENTO.is_(None),
+        DeClienteV2.PROXIMO_REINTENTO <= bindparam("ahora")
+    ),
+)
+
+_STMT_RECLAMAR_PENDIENTES = (
+    select(*_COLUMNAS_CLIENTE)
+    .where(*_FILTRO_PENDIENTES_LISTOS)
+    .order_by(DeClienteV2.FECHA_CREACION_REGISTRO.asc())
+    .with_for_update(skip_locked=True)
+    # El dialecto mssql no emite FOR UPDATE: el equivalente va como table hint
+    .with_hint(DeClienteV2, "WITH (UPDLOCK, READPAST, ROWLOCK)", "mssql")
+)
+
+_STMT_CONTAR_PENDIENTES = (
+    select(func.count())
+    .select_from(DeClienteV2)
+    .where(*_FILTRO_PENDIENTES_LISTOS)
+)
+
+
+def _espera_siguiente_ciclo() -> int:
+    """
+    Segundos hasta el próximo ciclo tras un ciclo con clientes, según cuántos
+    pendientes quedan listos: con cola se drena rápido; si la cola quedó vacía
+    parte el backoff de _espera_cola_vacia desde el mínimo.
+    """
     try:
-        cliente = db.query(DeClienteV2).filter(
-            DeClienteV2.ESTADO_CONSULTA == 'Pendiente'
-        ).order_by(
-            DeClienteV2.FECHA_CREACION_REGISTRO.asc()
-        ).first()
-        return cliente
+        with DaemonSessionLocal() as db:
+            pendientes = db.execute(
+                _STMT_CONTAR_PENDIENTES, {"ahora": datetime.now()}
+            ).scalar_one()
+    except Exception as e:
+        # Un fallo puntual del COUNT no debe frenar 30 min un daemon que acaba
+        # de procesar un lote: se asume cola y el próximo reclamo lo confirma
+        log("⚠️ No se pudo contar pendientes: %s", e)
+        return ESPERA_CON_COLA
+    
+    if pendientes > COLA_GRANDE:
+        return ESPERA_CON_COLA
+    if pendientes > 0:
+        return ESPERA_COLA_PEQUENA
+    # Se acaba de vaciar la cola: el backoff de ciclos vacíos parte del mínimo
+    return ESPERA_MINIMA_SIN_PENDIENTES
+
+
+def _espera_cola_vacia(ciclos_vacios: int) -> int:
+    """Backoff exponencial acotado tras `ciclos_vacios` ciclos seguidos sin pendientes"""
+    espera = ESPERA_MINIMA_SIN_PENDIENTES * ESPERA_FACTOR_BACKOFF ** ciclos_vacios
+    return int(min(ESPERA_SIN_PENDIENTES, espera))
+
+
+def _reclamar_clientes_pendientes(limite: int = 1) -> List[Tuple[Row, int, str]]:
+    """
+    Reclama atómicamente hasta `limite` clientes pendientes y crea sus procesos.
+    Solo clientes sin reintento pendiente (PROXIMO_REINTENTO vencido o nulo).
+    SELECT ... FOR UPDATE SKIP LOCKED (READPAST en SQL Server) + paso a 'Procesando'
+    + INSERT de los procesos en la misma transacción corta: dos daemons nunca toman
+    el mismo cliente y no queda un cliente 'Procesando' sin proceso.
+
+    Retorna [(cliente, proceso_id, job_id), ...] (vacía si no hay pendientes); `cliente`
+    es una Row con _COLUMNAS_CLIENTE (no una entidad ORM).
+    """
+    db = DaemonSessionLocal()
+    try:
+        clientes = db.execute(
+            _STMT_RECLAMAR_PENDIENTES.limit(limite), {"ahora": datetime.now()}
+        ).all()
+        if not clientes:
+            db.commit()
+            return []
+        
+        cliente_ids = [cliente.id for cliente in clientes]
+        db.execute(
+            update(DeClienteV2)
+            .where(DeClienteV2.id.in_(cliente_ids))
+            .values(ESTADO_CONSULTA='Procesando')
+        )
+        procesos = _crear_procesos(db, cliente_ids)
+        db.commit()
+        return [
+            (cliente, proceso_id, job_id)
+            for cliente, (proceso_id, job_id) in zip(clientes, procesos)
+        ]
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
 
 
 def _ejecutar_consulta_funcion_judicial(
     proceso_id: int,
-    cliente_id: int,
+    cliente: Row,
     nombres: str,
     job_id: str
 ) -> bool:
@@ -227,14 +504,15 @@ def _ejecutar_consulta_funcion_judicial(
     ✅ CASO 4: HTTPX + "Página 1 sin resultados" → build_report_docx (vacío) + guardar BD → Procesado
     ❌ Error real → Resetear a Pendiente
     """
-    log(f"🌐 Intentando web scraping para: {nombres}")
+    cliente_id = cliente.id
+    log("🌐 Intentando web scraping para: %s", nombres)
     
     try:
         # ===== INTENTO 1: WEB SCRAPING =====
-        resultado_scraping = process_funcion_judicial_once(nombres, headless=True)
+        resultado_scraping = _consultar_funcion_judicial(nombres)
         
-        # Obtener datos del cliente
-        meta_cliente = _obtener_cliente_datos(cliente_id)
+        # Datos del cliente (ya reclamado y cargado: sin otra consulta)
+        meta_cliente = _datos_cliente_para_reporte(cliente)
         meta_cliente['fecha_consulta'] = datetime.now()
         
         # Verificar si fue exitoso
@@ -243,7 +521,7 @@ def _ejecutar_consulta_funcion_judicial(
             
             # ===== CASO 1: SCRAPING EXITOSO CON RESULTADOS =====
             if scenario == 'results_found':
-                log(f"✅ [CASO 1] Scraping exitoso - Resultados encontrados")
+                log("✅ [CASO 1] Scraping exitoso - Resultados encontrados")
                 
                 try:
                     # Construir datos para reporte
@@ -252,33 +530,29 @@ def _ejecutar_consulta_funcion_judicial(
                     }
                     
                     # ✅ LLAMAR build_report_docx
-                    ruta_reporte = build_report_docx(
+                    ruta_reporte, tamano_bytes = build_report_docx(
                         job_id=job_id,
                         meta=meta_cliente,
                         results=results
                     )
                     
-                    if ruta_reporte and os.path.exists(ruta_reporte):
-                        log(f"✅ Reporte generado: {ruta_reporte}")
+                    if ruta_reporte:
+                        log("✅ Reporte generado: %s", ruta_reporte)
                         
-                        if _guardar_reporte_en_bd(
-                            cliente_id, proceso_id, job_id, nombres, 
-                            ruta_reporte, 
-                            'Función Judicial (Scraping con resultados)'
-                        ):
-                            _actualizar_proceso(proceso_id, 'Completado', exitoso=True)
-                            return True
-                        else:
-                            log(f"⚠️ Reporte generado pero no guardado en BD")
-                            return False
+                        return _registrar_exito(
+                            cliente_id, proceso_id, job_id,
+                            ruta_reporte, tamano_bytes,
+                            'Función Judicial (Scraping con resultados)',
+                            completar_sin_reporte=False
+                        )
                 except Exception as e:
-                    log(f"⚠️ Error generando reporte: {e}")
-                    _actualizar_cliente_estado(cliente_id, 'Pendiente')
+                    log("⚠️ Error generando reporte: %s", e)
+                    _registrar_fallo(cliente_id, proceso_id, None)
                     return False
             
             # ===== CASO 2: SCRAPING SIN PROCESOS JUDICIALES =====
             elif scenario == 'no_results':
-                log(f"✅ [CASO 2] Scraping completado: Sin Procesos Judiciales")
+                log("✅ [CASO 2] Scraping completado: Sin Procesos Judiciales")
                 
                 try:
                     # Construir datos para reporte (sin datos pero con encabezado)
@@ -287,168 +561,162 @@ def _ejecutar_consulta_funcion_judicial(
                     }
                     
                     # ✅ LLAMAR build_report_docx (incluso sin resultados)
-                    ruta_reporte = build_report_docx(
+                    ruta_reporte, tamano_bytes = build_report_docx(
                         job_id=job_id,
                         meta=meta_cliente,
                         results=results
                     )
                     
-                    if ruta_reporte and os.path.exists(ruta_reporte):
-                        log(f"✅ Reporte sin procesos generado: {ruta_reporte}")
+                    if ruta_reporte:
+                        log("✅ Reporte sin procesos generado: %s", ruta_reporte)
                         
-                        if _guardar_reporte_en_bd(
-                            cliente_id, proceso_id, job_id, nombres,
-                            ruta_reporte,
+                        # Si falla el guardado en BD se sigue adelante como "procesado"
+                        return _registrar_exito(
+                            cliente_id, proceso_id, job_id,
+                            ruta_reporte, tamano_bytes,
                             'Función Judicial (Scraping sin procesos)'
-                        ):
-                            _actualizar_proceso(proceso_id, 'Completado', exitoso=True)
-                            return True
-                        else:
-                            # Reporte generado pero error al guardar BD
-                            # Seguir adelante como "procesado"
-                            _actualizar_proceso(proceso_id, 'Completado', exitoso=True)
-                            return True
+                        )
                 except Exception as e:
-                    log(f"⚠️ Error generando reporte sin procesos: {e}")
+                    log("⚠️ Error generando reporte sin procesos: %s", e)
                     # Aun así marcar como procesado
-                    _actualizar_proceso(proceso_id, 'Completado', exitoso=True)
-                    return True
+                    return _registrar_exito_sin_reporte(cliente_id, proceso_id)
         
         # ===== INTENTO 2: HTTPX FALLBACK =====
-        log(f"⚠️ [SCRAPING] Error o indeterminado, intentando HTTP fallback...")
-        log(f"🌐 [HTTPX FALLBACK] Iniciando...")
+        log("⚠️ [SCRAPING] Error o indeterminado, intentando HTTP fallback...")
+        log("🌐 [HTTPX FALLBACK] Iniciando...")
         
         # ✅ MEJORA: generar_reporte_httpx retorna (ruta, resultado_dict)
         ruta_reporte_http, resultado_httpx = generar_reporte_httpx(nombres, job_id)
         
         if ruta_reporte_http is not None:
             # HTTPX generó un reporte (con o sin datos)
-            log(f"✅ [HTTPX FALLBACK] Reporte generado: {ruta_reporte_http}")
-            log(f"   - Escenario: {resultado_httpx.get('scenario')}")
-            log(f"   - Procesos: {resultado_httpx.get('total_procesos')}")
+            log("✅ [HTTPX FALLBACK] Reporte generado: %s", ruta_reporte_http)
+            log("   - Escenario: %s", resultado_httpx.get('scenario'))
+            log("   - Procesos: %s", resultado_httpx.get('total_procesos'))
             
             try:
                 # ✅ CASO 3: HTTPX + RESULTADOS
                 if resultado_httpx.get('scenario') == 'results_found':
-                    log(f"✅ [CASO 3] HTTPX encontró resultados")
+                    log("✅ [CASO 3] HTTPX encontró resultados")
                     
-                    # Guardar en BD
-                    if _guardar_reporte_en_bd(
-                        cliente_id, proceso_id, job_id, nombres,
-                        ruta_reporte_http,
+                    # Guardar en BD (si falla, el reporte existe: se completa igual)
+                    return _registrar_exito(
+                        cliente_id, proceso_id, job_id,
+                        ruta_reporte_http, resultado_httpx.get('tamano_bytes', 0),
                         'Función Judicial (HTTPX con resultados)'
-                    ):
-                        _actualizar_proceso(proceso_id, 'Completado', exitoso=True)
-                        return True
-                    else:
-                        # Error BD pero reporte existe
-                        _actualizar_proceso(proceso_id, 'Completado', exitoso=True)
-                        return True
+                    )
                 
                 # ✅ CASO 4: HTTPX + "PÁGINA 1 SIN RESULTADOS" (NUEVO)
                 elif resultado_httpx.get('scenario') == 'no_results':
-                    log(f"✅ [CASO 4] HTTPX: Página 1 sin resultados → Generar reporte vacío")
+                    log("✅ [CASO 4] HTTPX: Página 1 sin resultados → Generar reporte vacío")
                     
                     # Guardar en BD (aunque sea reporte vacío)
-                    if _guardar_reporte_en_bd(
-                        cliente_id, proceso_id, job_id, nombres,
-                        ruta_reporte_http,
+                    return _registrar_exito(
+                        cliente_id, proceso_id, job_id,
+                        ruta_reporte_http, resultado_httpx.get('tamano_bytes', 0),
                         'Función Judicial (HTTPX sin procesos)'
-                    ):
-                        _actualizar_proceso(proceso_id, 'Completado', exitoso=True)
-                        return True
-                    else:
-                        # Error BD pero reporte existe
-                        _actualizar_proceso(proceso_id, 'Completado', exitoso=True)
-                        return True
+                    )
                 
                 else:
                     # Escenario error en HTTPX
-                    log(f"⚠️ HTTPX retornó error: {resultado_httpx.get('mensaje')}")
-                    _actualizar_cliente_estado(cliente_id, 'Pendiente')
-                    _actualizar_proceso(proceso_id, 'Error_HTTPX', exitoso=False)
+                    log("⚠️ HTTPX retornó error: %s", resultado_httpx.get('mensaje'))
+                    _registrar_fallo(cliente_id, proceso_id, 'Error_HTTPX')
                     return False
                     
             except Exception as e:
-                log(f"❌ Error procesando reporte HTTPX: {e}")
-                _actualizar_cliente_estado(cliente_id, 'Pendiente')
+                log("❌ Error procesando reporte HTTPX: %s", e)
+                _registrar_fallo(cliente_id, proceso_id, None)
                 return False
         
         else:
             # ❌ HTTPX retornó error crítico
-            log(f"❌ [HTTPX FALLBACK] Error crítico: {resultado_httpx.get('mensaje')}")
-            _actualizar_cliente_estado(cliente_id, 'Pendiente')
-            _actualizar_proceso(proceso_id, 'Error_Total', exitoso=False)
+            log("❌ [HTTPX FALLBACK] Error crítico: %s", resultado_httpx.get('mensaje'))
+            _registrar_fallo(cliente_id, proceso_id, 'Error_Total')
             return False
         
     except Exception as e:
-        log(f"❌ Error en scraping: {str(e)}")
-        traceback.print_exc()
+        # Traza completa por el mismo logger encolado (no bloquea en stderr)
+        _logger.exception("[DAEMON] ❌ Error en scraping: %s", e)
         
-        _actualizar_cliente_estado(cliente_id, 'Pendiente')
-        _actualizar_proceso(proceso_id, 'Error_Total', exitoso=False)
+        _registrar_fallo(cliente_id, proceso_id, 'Error_Total')
         
         return False
 
 
+def _procesar_cliente(cliente: Row, proceso_id: int, job_id: str) -> bool:
+    """Ejecuta la consulta de un cliente ya reclamado (con su proceso creado)"""
+    nombres = f"{cliente.APELLIDOS_CLIENTE} {cliente.NOMBRES_CLIENTE}".strip()
+    log("📋 Procesando: %s (ID: %s)", nombres, cliente.id)
+    
+    # Ejecutar consulta
+    exito = _ejecutar_consulta_funcion_judicial(
+        proceso_id, cliente, nombres, job_id
+    )
+    
+    if exito:
+        # ESTADO_CONSULTA='Procesado' ya se confirmó junto con reporte y proceso
+        log("🎉 Cliente %s procesado exitosamente", cliente.id)
+    else:
+        log("⚠️ Cliente %s no se pudo procesar", cliente.id)
+    return exito
+
+
 def _daemon_loop():
     """Loop principal del daemon"""
-    global daemon_running
+    global daemon_running, espera_actual, proximo_ciclo
     
     log("🚀 Daemon iniciado")
     ciclo = 0
+    ciclos_vacios = 0
     
-    while daemon_running:
-        ciclo += 1
-        
-        try:
-            log(f"🔄 CICLO #{ciclo}")
-            
-            cliente = _obtener_cliente_pendiente()
+    if not sistema_listo.is_set():
+        log("⏳ Esperando a que termine la inicialización del sistema...")
+        while daemon_running and not sistema_listo.wait(timeout=1):
+            pass
+    
+    with ThreadPoolExecutor(max_workers=DAEMON_WORKERS, thread_name_prefix="daemon-fj") as executor:
+        while daemon_running:
+            ciclo += 1
             
-            if not cliente:
-                log("📭 No hay clientes pendientes")
-            else:
-                nombres = f"{cliente.APELLIDOS_CLIENTE} {cliente.NOMBRES_CLIENTE}".strip()
-                log(f"📋 Procesando: {nombres} (ID: {cliente.id})")
+            try:
+                log("🔄 CICLO #%s", ciclo)
                 
-                # Cambiar a Procesando
-                _actualizar_cliente_estado(cliente.id, 'Procesando')
+                # Clientes → 'Procesando' y sus procesos, todo en una transacción
+                reclamos = _reclamar_clientes_pendientes(DAEMON_LOTE)
                 
-                # Crear proceso
-                proceso_id = _crear_proceso(cliente.id)
-                if not proceso_id:
-                    log(f"❌ No se pudo crear proceso")
-                    _actualizar_cliente_estado(cliente.id, 'Pendiente')
-                    continue
+                if not reclamos:
+                    log("📭 No hay clientes pendientes")
+                else:
+                    # Sin dependencias entre clientes: un worker por cliente reclamado
+                    list(executor.map(lambda r: _procesar_cliente(*r), reclamos))
                 
-                # Obtener job_id
-                job_id = _obtener_job_id(proceso_id)
+                # Esperar según la cola (o hasta que se detenga el daemon)
+                if reclamos:
+                    ciclos_vacios = 0
+                    espera = _espera_siguiente_ciclo()
+                else:
+                    espera = _espera_cola_vacia(ciclos_vacios)
+                    # Una vez en el tope no se sigue contando (evita desbordar el float)
+                    if espera < ESPERA_SIN_PENDIENTES:
+                        ciclos_vacios += 1
+                log_debug("⏳ Esperando %s min %s s...", espera // 60, espera % 60)
+                espera_actual = espera
+                proximo_ciclo = datetime.now() + timedelta(seconds=espera)
                 
-                # Ejecutar consulta
-                exito = _ejecutar_consulta_funcion_judicial(
-                    proceso_id, cliente.id, nombres, job_id
-                )
+                if daemon_stop.wait(timeout=espera):
+                    break
                 
-                if exito:
-                    _actualizar_cliente_estado(cliente.id, 'Procesado')
-                    log(f"🎉 Cliente {cliente.id} procesado exitosamente")
-                else:
-                    log(f"⚠️ Cliente {cliente.id} no se pudo procesar")
-            
-            # Esperar 30 minutos
-            log("⏳ Esperando 30 minutos...")
-            
-            for i in range(1800):
-                if not daemon_running:
+            except Exception as e:
+                _logger.exception("[DAEMON] ❌ Error en ciclo: %s", e)
+                # Pausa tras el error, pero detener_daemon la corta al instante
+                if daemon_stop.wait(timeout=60):
                     break
-                time.sleep(1)
-            
-        except Exception as e:
-            log(f"❌ Error en ciclo: {e}")
-            traceback.print_exc()
-            time.sleep(60)
     
+    _cerrar_navegadores()
+    # Pool propio del daemon: sin loop no hay quien use sus conexiones
+    # (se vuelve a llenar solo si el daemon se reinicia)
+    daemon_engine.dispose()
+    espera_actual = proximo_ciclo = None
     log("🛑 Daemon detenido")
 
 
@@ -456,6 +724,8 @@ def iniciar_daemon():
     """Inicia el daemon"""
     global daemon_thread, daemon_running
     
+    # El lock cubre el check-and-set de daemon_running y el arranque del hilo:
+    # dos POST /iniciar simultáneos no arrancan dos hilos
     with daemon_lock:
         if daemon_running:
             return {
@@ -463,46 +733,69 @@ def iniciar_daemon():
                 "message": "Daemon ya está en ejecución",
                 "estado": "running"
             }
-        
+        # Tras un stop→start rápido el loop anterior puede seguir vivo (terminando
+        # su lote): limpiar daemon_stop ahora lo reanimaría junto al nuevo, y su
+        # salida cerraría navegadores y el pool que el nuevo está usando
+        anterior = daemon_thread
+        if anterior is not None and anterior.is_alive():
+            anterior.join(timeout=ESPERA_JOIN_ANTERIOR)
+            if anterior.is_alive():
+                return {
+                    "success": False,
+                    "message": "El daemon anterior aún se está deteniendo; reintente en unos segundos",
+                    "estado": "stopping"
+                }
         daemon_running = True
+        daemon_stop.clear()
+        
         daemon_thread = threading.Thread(target=_daemon_loop, daemon=True)
         daemon_thread.start()
-        
-        return {
-            "success": True,
-            "message": "Daemon iniciado",
-            "estado": "running",
-            "thread_id": daemon_thread.ident
-        }
+    
+    return {
+        "success": True,
+        "message": "Daemon iniciado",
+        "estado": "running",
+        "thread_id": daemon_thread.ident
+    }
 
 
 def detener_daemon():
-    """Detiene el daemon"""
+    """Detiene el daemon (sin lock: bajar el flag y activar el Event son idempotentes)"""
     global daemon_running
     
-    with daemon_lock:
-        if not daemon_running:
-            return {
-                "success": False,
-                "message": "Daemon no está en ejecución",
-                "estado": "stopped"
-            }
-        
-        daemon_running = False
-        
+    if not daemon_running:
         return {
-            "success": True,
-            "message": "Daemon detenido",
+            "success": False,
+            "message": "Daemon no está en ejecución",
             "estado": "stopped"
         }
+    
+    daemon_running = False
+    daemon_stop.set()
+    
+    return {
+        "success": True,
+        "message": "Daemon detenido",
+        "estado": "stopped"
+    }
 
 
 def obtener_estado_daemon():
-    """Obtiene estado del daemon"""
-    global daemon_running, daemon_thread
+    """
+    Obtiene estado del daemon.
+    Sin daemon_lock (solo protege el arranque): leer los globales es atómico
+    y el endpoint de estado no espera por una transición en curso.
+    """
+    thread = daemon_thread
+    proximo = proximo_ciclo
     
     return {
         "running": daemon_running,
-        "thread_alive": daemon_thread.is_alive() if daemon_thread else False,
+        "thread_alive": thread.is_alive() if thread else False,
+        # Espera adaptativa entre ciclos y sus cotas (ver _espera_siguiente_ciclo)
+        "espera_actual_s": espera_actual,
+        "espera_min_s": min(ESPERA_CON_COLA, ESPERA_MINIMA_SIN_PENDIENTES),
+        "espera_max_s": ESPERA_SIN_PENDIENTES,
+        "proximo_ciclo": proximo.isoformat() if proximo else None,
         "timestamp": datetime.now().isoformat()
     }
\ No newline at end of file
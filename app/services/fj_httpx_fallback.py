@@ -20,7 +20,10 @@ from docx import Document
 from datetime import datetime, timedelta, timezone
 import os
 from typing import Optional, List, Dict, Any, Tuple
-import traceback
+import atexit
+
+from app.services.report_builder import guardar_docx
+from core.utils.log import get_logger
 
 # ===== CONFIGURACIÓN =====
 API_BASE_URL = "https://api.funcionjudicial.gob.ec/EXPEL-CONSULTA-CAUSAS-SERVICE"
@@ -31,11 +34,29 @@ REPORTS_DIR = "sri_ruc_output/reports"
 # Crear directorio si no existe
 os.makedirs(REPORTS_DIR, exist_ok=True)
 
+# Cliente HTTP compartido: conexiones keep-alive a la API entre páginas y entre
+# consultas (sin un handshake TCP+TLS por request). httpx.Client es thread-safe.
+# Timeouts explícitos: conectar falla rápido (10 s) y la espera por una conexión
+# libre del pool está acotada (60 s): con más workers que conexiones, o una
+# conexión colgada, el worker recibe PoolTimeout (→ error de página) en vez de
+# bloquearse para siempre.
+_FJ_HTTP_CLIENT = httpx.Client(
+    timeout=httpx.Timeout(30.0, connect=10.0, pool=60.0),
+    limits=httpx.Limits(max_connections=4, max_keepalive_connections=2, keepalive_expiry=300),
+    headers={
+        "Content-Type": "application/json",
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    },
+)
+atexit.register(_FJ_HTTP_CLIENT.close)
+
+
+_logger = get_logger("httpx_fallback")
+
 
-def log(msg: str):
-    """Logging con timestamp para HTTPX fallback"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[HTTPX FALLBACK {timestamp}] {msg}")
+def log(msg: str, *args):
+    """Encola el mensaje (formato %s perezoso); el QueueListener pone el timestamp"""
+    _logger.info("[HTTPX FALLBACK] " + msg, *args)
 
 
 def _convertir_fecha_utc_a_ecuador(fecha_str: str) -> str:
@@ -68,17 +89,22 @@ def _convertir_fecha_utc_a_ecuador(fecha_str: str) -> str:
         # Retornar formateado
         return dt_ec.strftime("%d/%m/%Y")
     except Exception as e:
-        log(f"⚠️ Error convirtiendo fecha '{fecha_str}': {e}")
+        log("⚠️ Error convirtiendo fecha '%s': %s", fecha_str, e)
         return fecha_str[:10] if len(fecha_str) >= 10 else "N/A"
 
 
-def _consultar_pagina_api(nombre_buscado: str, page: int) -> Optional[List[Dict[str, Any]]]:
+def _consultar_pagina_api(
+    nombre_buscado: str,
+    page: int,
+    client: httpx.Client = _FJ_HTTP_CLIENT
+) -> Optional[List[Dict[str, Any]]]:
     """
     Consulta una página de la API de Función Judicial.
     
     Args:
         nombre_buscado: Nombre del demandado a buscar
         page: Número de página (1-based)
+        client: Cliente HTTP (por defecto el compartido del módulo)
         
     Returns:
         Lista de procesos encontrados, lista vacía si sin resultados, None si error
@@ -107,17 +133,11 @@ def _consultar_pagina_api(nombre_buscado: str, page: int) -> Optional[List[Dict[
             "pageSize": PAGE_SIZE
         }
         
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        
-        # Usar httpx con timeout
-        with httpx.Client(timeout=30.0) as client:
-            response = client.post(url, json=payload, headers=headers)
+        # Cliente reutilizado (headers y timeout ya configurados)
+        response = client.post(url, json=payload)
         
         if response.status_code != 200:
-            log(f"⚠️ API retornó status {response.status_code}")
+            log("⚠️ API retornó status %s", response.status_code)
             return None
         
         # Parsear respuesta
@@ -135,16 +155,17 @@ def _consultar_pagina_api(nombre_buscado: str, page: int) -> Optional[List[Dict[
         return resultados if resultados else []
         
     except httpx.TimeoutException:
-        log(f"⚠️ Timeout consultando página {page}")
+        log("⚠️ Timeout consultando página %s", page)
         return None
     except Exception as e:
-        log(f"⚠️ Error consultando API página {page}: {e}")
+        log("⚠️ Error consultando API página %s: %s", page, e)
         return None
 
 
 def generar_reporte_httpx(
     nombre_cliente: str,
-    job_id: str
+    job_id: str,
+    client: httpx.Client = _FJ_HTTP_CLIENT
 ) -> Tuple[Optional[str], Dict[str, Any]]:
     """
     Genera reporte DOCX consultando API de Función Judicial directamente.
@@ -157,6 +178,7 @@ def generar_reporte_httpx(
     Args:
         nombre_cliente: Nombre completo del cliente (ej: "PAMELA ALEXANDRA CASTRO DEL POZO")
         job_id: ID único del proceso (ej: "daemon_8d8c1f044264")
+        client: Cliente HTTP (por defecto el compartido del módulo)
         
     Returns:
         Tupla (ruta_reporte, resultado_dict):
@@ -165,11 +187,12 @@ def generar_reporte_httpx(
             'scenario': 'results_found' | 'no_results',
             'total_procesos': int,
             'total_paginas': int,
-            'mensaje': str
+            'mensaje': str,
+            'tamano_bytes': int  # tamaño del DOCX escrito
           }
     """
     try:
-        log(f"🌐 Iniciando consulta API para: {nombre_cliente}")
+        log("🌐 Iniciando consulta API para: %s", nombre_cliente)
         
         # 1. Crear documento
         doc = Document()
@@ -186,18 +209,18 @@ def generar_reporte_httpx(
         pagina_actual = 1
         
         for page in range(1, MAX_PAGES + 1):
-            log(f"📄 Consultando página {page}...")
+            log("📄 Consultando página %s...", page)
             
-            resultados = _consultar_pagina_api(nombre_cliente, page)
+            resultados = _consultar_pagina_api(nombre_cliente, page, client)
             
             # ✅ MEJORA: Diferenciar entre "sin datos" (lista vacía) y "error" (None)
             if resultados is None:
-                log(f"⚠️ Error consultando página {page}, deteniendo...")
+                log("⚠️ Error consultando página %s, deteniendo...", page)
                 break  # Error de red, detener
             
             if not resultados:
                 # Lista vacía = "Página sin resultados" (no error)
-                log(f"📭 Página {page} sin resultados, finalizando")
+                log("📭 Página %s sin resultados, finalizando", page)
                 break  # Sin más páginas
             
             # Sí hay datos
@@ -239,6 +262,11 @@ def generar_reporte_httpx(
             
             # Espacio entre páginas
             doc.add_paragraph("")
+            
+            # Página incompleta = última página: no se pide la siguiente
+            # (ahorra un round-trip a la API en el caso habitual de pocos procesos)
+            if len(resultados) < PAGE_SIZE:
+                break
         
         # ✅ MEJORA: Generar reporte INCLUSO sin datos
         
@@ -262,13 +290,13 @@ def generar_reporte_httpx(
         ruta_completa = os.path.join(REPORTS_DIR, nombre_archivo)
         
         try:
-            doc.save(ruta_completa)
-            log(f"✅ Reporte DOCX generado: {ruta_completa}")
-            log(f"   - Escenario: {scenario}")
-            log(f"   - Total procesos: {total_resultados}")
-            log(f"   - Páginas: {pagina_actual}")
+            tamano_bytes = guardar_docx(doc, ruta_completa)
+            log("✅ Reporte DOCX generado: %s", ruta_completa)
+            log("   - Escenario: %s", scenario)
+            log("   - Total procesos: %s", total_resultados)
+            log("   - Páginas: %s", pagina_actual)
         except Exception as e:
-            log(f"❌ Error guardando documento: {e}")
+            log("❌ Error guardando documento: %s", e)
             return None, {
                 "scenario": "error",
                 "total_procesos": 0,
@@ -281,14 +309,14 @@ def generar_reporte_httpx(
             "scenario": scenario,
             "total_procesos": total_resultados,
             "total_paginas": pagina_actual,
-            "mensaje": mensaje
+            "mensaje": mensaje,
+            "tamano_bytes": tamano_bytes
         }
         
         return ruta_completa, resultado
         
     except Exception as e:
-        log(f"❌ Error generando reporte HTTPX: {e}")
-        traceback.print_exc()
+        _logger.exception("[HTTPX FALLBACK] ❌ Error generando reporte HTTPX: %s", e)
         
         # ✅ MEJORA: Retornar (None, error_dict) en caso de error crítico
         return None, {
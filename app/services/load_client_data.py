@@ -4,160 +4,108 @@ Carga datos desde DB origen (DB2) a DB destino (SQL Server)
 Inserta en la NUEVA tabla de_clientes_rpa_v2
 """
 
-from sqlalchemy import text
+from typing import Any, Dict, List
+
+from sqlalchemy import bindparam, insert, select, text
 from datetime import datetime
 
-def load_client_data(origen_db, destino_db, start_date: str, end_date: str):
+from app.db.models import DeClienteV2
+
+# Filas por lote: un executemany y un commit por lote
+BATCH_SIZE = 5000
+
+# IDs por consulta de existencia (SQL Server admite ~2100 parámetros por sentencia)
+_EXISTENTES_CHUNK = 1000
+
+_STMT_IDS_EXISTENTES = select(DeClienteV2.ID_SOLICITUD).where(
+    DeClienteV2.ID_SOLICITUD.in_(bindparam("ids", expanding=True))
+)
+
+# Columnas copiadas tal cual desde la fila de origen
+_COLUMNAS_ORIGEN = (
+    "ID_SOLICITUD",
+    "FECHA_CREACION_SOLICITUD",
+    "ESTADO",
+    "AGENCIA",
+    "ID_PRODUCTO",
+    "PRODUCTO",
+    "CEDULA",
+    "NOMBRES_CLIENTE",
+    "APELLIDOS_CLIENTE",
+    "ESTADO_CIVIL",
+    "CEDULA_CONYUGE",
+    "NOMBRES_CONYUGE",
+    "APELLIDOS_CONYUGE",
+    "CEDULA_CODEUDOR",
+    "NOMBRES_CODEUDOR",
+    "APELLIDOS_CODEUDOR",
+)
+
+
+def _filtrar_nuevos(destino_db, lote: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    Carga datos desde la DB origen hacia la DB destino.
-    ✅ CORREGIDO: Inserta en de_clientes_rpa_v2 (tabla nueva)
-    
-    Args:
-        origen_db: sesión SQLAlchemy de la DB origen (lectura)
-        destino_db: sesión SQLAlchemy de la DB destino (escritura)
-        start_date: fecha inicial 'YYYY-MM-DD'
-        end_date: fecha final 'YYYY-MM-DD'
+    Quita del lote los ID_SOLICITUD repetidos dentro del propio lote (el DISTINCT
+    sobre los joins de cónyuge/codeudor puede repetirlos) y los que ya existen
+    en destino (re-cargar un rango de fechas solapado es normal).
     """
-    query = text("""
-    SELECT DISTINCT 
-        SC.ID_SOLICITUD,
-        CONVERT(DATE, SC.FECHA_HORA_SOLIC) AS FECHA_CREACION_SOLICITUD,
-        (SELECT S.DESC_ESTADO FROM dbo.CR_ESTADO_SEG S WHERE S.ID_ESTADO = SC.ESTADO) AS ESTADO,
-        (SELECT H.DESCRIP_ORIGEN FROM dbo.AH_ORIGEN H WHERE H.ID_AGENCIA = SC.AGENCIA) AS AGENCIA,
-        PR.ID_PRODUCTO,
-        PR.PRODUCTO,
-        CC.CEDULA,
-        RTRIM(CC.NOMBRES) AS NOMBRES_CLIENTE,
-        RTRIM(CC.APELLIDOS) AS APELLIDOS_CLIENTE,
-        CC.ESTADO_CIVIL,
-        CO.CEDULA_CONYUGE,
-        CO.NOMBRES_CONYUGE,
-        CO.APELLIDOS_CONYUGE,
-        IT.CEDULA_CODEUDOR,
-        IT.NOMBRES_CODEUDOR,
-        IT.APELLIDOS_CODEUDOR
-    FROM dbo.CL_CLIENTE CC
-    LEFT JOIN dbo.CL_SOLICITUD_CRED SC ON SC.ID_CLIENTE = CC.ID_CLIENTE
-    INNER JOIN (
-        SELECT R.ID_SOLICITUD, O.ID_PRODUCTO, O.NOM_PRODUCTO AS PRODUCTO
-        FROM dbo.CR_OPERACION R
-        INNER JOIN dbo.CR_PRODUCTO_OC O ON R.PRODUCTO = O.ID_PRODUCTO
-    ) AS PR ON PR.ID_SOLICITUD = SC.ID_SOLICITUD
-    LEFT JOIN (
-        SELECT T.ID_SOLICITUD, C.CEDULA AS CEDULA_CONYUGE, RTRIM(C.NOMBRES) AS NOMBRES_CONYUGE, RTRIM(C.APELLIDOS) AS APELLIDOS_CONYUGE
-        FROM dbo.CL_INTEGRANTE_CRED T
-        INNER JOIN dbo.CL_CLIENTE C ON T.ID_CONYUGUE = C.ID_CLIENTE
-        WHERE T.TIPO = 'DEUDOR'
-    ) AS CO ON CO.ID_SOLICITUD = SC.ID_SOLICITUD
-    LEFT JOIN (
-        SELECT T.ID_SOLICITUD, C.CEDULA AS CEDULA_CODEUDOR, RTRIM(C.NOMBRES) AS NOMBRES_CODEUDOR, RTRIM(C.APELLIDOS) AS APELLIDOS_CODEUDOR
-        FROM dbo.CL_INTEGRANTE_CRED T
-        INNER JOIN dbo.CL_CLIENTE C ON T.ID_CLIENTE = C.ID_CLIENTE
-        WHERE T.TIPO = 'CODEUDOR'
-    ) AS IT ON IT.ID_SOLICITUD = SC.ID_SOLICITUD
-    WHERE CONVERT(DATE, SC.FECHA_HORA_SOLIC) BETWEEN :start_date AND :end_date;
-    """)
+    vistos = set()
+    unicos = []
+    for registro in lote:
+        id_solicitud = registro["ID_SOLICITUD"]
+        if id_solicitud is not None:
+            if id_solicitud in vistos:
+                continue
+            vistos.add(id_solicitud)
+        unicos.append(registro)
 
-    result = origen_db.execute(query, {"start_date": start_date, "end_date": end_date}).fetchall()
+    ids = list(vistos)
+    existentes = set()
+    for i in range(0, len(ids), _EXISTENTES_CHUNK):
+        existentes.update(
+            destino_db.execute(_STMT_IDS_EXISTENTES, {"ids": ids[i:i + _EXISTENTES_CHUNK]}).scalars()
+        )
+    if not existentes:
+        return unicos
+    return [r for r in unicos if r["ID_SOLICITUD"] not in existentes]
 
-    contador = 0
-    for row in result:
+
+def _insertar_fila_a_fila(destino_db, lote: List[Dict[str, Any]]) -> int:
+    """Respaldo si falla el lote: inserta fila a fila y solo omite las que fallan."""
+    insertados = 0
+    for registro in lote:
         try:
-            # ✅ CORREGIDO: Insertar en de_clientes_rpa_v2 (tabla NUEVA)
-            destino_db.execute(
-                text("""
-                    INSERT INTO de_clientes_rpa_v2 (
-                        id,
-                        ID_SOLICITUD,
-                        ESTADO,
-                        AGENCIA,
-                        ID_PRODUCTO,
-                        PRODUCTO,
-                        CEDULA,
-                        NOMBRES_CLIENTE,
-                        APELLIDOS_CLIENTE,
-                        ESTADO_CIVIL,
-                        CEDULA_CONYUGE,
-                        NOMBRES_CONYUGE,
-                        APELLIDOS_CONYUGE,
-                        CEDULA_CODEUDOR,
-                        NOMBRES_CODEUDOR,
-                        APELLIDOS_CODEUDOR,
-                        ESTADO_CONSULTA,
-                        FECHA_CREACION_SOLICITUD,
-                        FECHA_CREACION_REGISTRO,
-                        FECHA_ULTIMA_CONSULTA
-                    ) VALUES (
-                        :id,
-                        :id_solicitud,
-                        :estado,
-                        :agencia,
-                        :id_producto,
-                        :producto,
-                        :cedula,
-                        :nombres_cliente,
-                        :apellidos_cliente,
-                        :estado_civil,
-                        :cedula_conyuge,
-                        :nombres_conyuge,
-                        :apellidos_conyuge,
-                        :cedula_codeudor,
-                        :nombres_codeudor,
-                        :apellidos_codeudor,
-                        :estado_consulta,
-                        :fecha_creacion_solicitud,
-                        :fecha_creacion_registro,
-                        :fecha_ultima_consulta
-                    )
-                """),
-                {
-                    "id": row["ID_SOLICITUD"],
-                    "id_solicitud": row["ID_SOLICITUD"],
-                    "estado": row["ESTADO"],
-                    "agencia": row["AGENCIA"],
-                    "id_producto": row["ID_PRODUCTO"],
-                    "producto": row["PRODUCTO"],
-                    "cedula": row["CEDULA"],
-                    "nombres_cliente": row["NOMBRES_CLIENTE"],
-                    "apellidos_cliente": row["APELLIDOS_CLIENTE"],
-                    "estado_civil": row["ESTADO_CIVIL"],
-                    "cedula_conyuge": row["CEDULA_CONYUGE"],
-                    "nombres_conyuge": row["NOMBRES_CONYUGE"],
-                    "apellidos_conyuge": row["APELLIDOS_CONYUGE"],
-                    "cedula_codeudor": row["CEDULA_CODEUDOR"],
-                    "nombres_codeudor": row["NOMBRES_CODEUDOR"],
-                    "apellidos_codeudor": row["APELLIDOS_CODEUDOR"],
-                    "estado_consulta": "Pendiente",
-                    "fecha_creacion_solicitud": row["FECHA_CREACION_SOLICITUD"],
-                    "fecha_creacion_registro": datetime.now(),
-                    "fecha_ultima_consulta": None
-                }
-            )
-            contador += 1
-            
+            destino_db.execute(insert(DeClienteV2), registro)
+            destino_db.commit()
+            insertados += 1
         except Exception as e:
-            print(f"⚠️ Error insertando registro {row['ID_SOLICITUD']}: {e}")
-            continue
+            destino_db.rollback()
+            print(f"⚠️ Error insertando solicitud {registro.get('ID_SOLICITUD')}: {e}")
+    return insertados
 
-    destino_db.commit()
-    print(f"✅ {contador} registros cargados en de_clientes_rpa_v2")
-EOF
-cat /mnt/user-data/outputs/load_client_data_CORREGIDO.py
-Salida
 
-# app/services/load_client_data.py - CORREGIDO para insertar en de_clientes_rpa_v2
-"""
-Carga datos desde DB origen (DB2) a DB destino (SQL Server)
-Inserta en la NUEVA tabla de_clientes_rpa_v2
-"""
+def _insertar_lote(destino_db, lote: List[Dict[str, Any]]) -> int:
+    """
+    Inserta un lote con un único INSERT Core (executemany) y lo confirma.
+    Si el lote falla, se reintenta fila a fila: una fila mala no descarta las demás.
+    """
+    try:
+        lote = _filtrar_nuevos(destino_db, lote)
+        if not lote:
+            return 0
+        destino_db.execute(insert(DeClienteV2), lote)
+        destino_db.commit()
+        return len(lote)
+    except Exception as e:
+        destino_db.rollback()
+        print(f"⚠️ Error insertando lote de {len(lote)} registros, reintentando fila a fila: {e}")
+        return _insertar_fila_a_fila(destino_db, lote)
 
-from sqlalchemy import text
-from datetime import datetime
 
 def load_client_data(origen_db, destino_db, start_date: str, end_date: str):
     """
     Carga datos desde la DB origen hacia la DB destino.
     ✅ CORREGIDO: Inserta en de_clientes_rpa_v2 (tabla nueva)
+    ⚡ Inserción por lotes con Core insert() en lugar de un INSERT por fila
     
     Args:
         origen_db: sesión SQLAlchemy de la DB origen (lectura)
@@ -205,86 +153,26 @@ def load_client_data(origen_db, destino_db, start_date: str, end_date: str):
     WHERE CONVERT(DATE, SC.FECHA_HORA_SOLIC) BETWEEN :start_date AND :end_date;
     """)
 
-    result = origen_db.execute(query, {"start_date": start_date, "end_date": end_date}).fetchall()
+    result = origen_db.execute(
+        query.execution_options(stream_results=True, yield_per=10_000),
+        {"start_date": start_date, "end_date": end_date},
+    ).mappings()
 
     contador = 0
+    ahora = datetime.now()
+    lote: List[Dict[str, Any]] = []
+
     for row in result:
-        try:
-            # ✅ CORREGIDO: Insertar en de_clientes_rpa_v2 (tabla NUEVA)
-            destino_db.execute(
-                text("""
-                    INSERT INTO de_clientes_rpa_v2 (
-                        id,
-                        ID_SOLICITUD,
-                        ESTADO,
-                        AGENCIA,
-                        ID_PRODUCTO,
-                        PRODUCTO,
-                        CEDULA,
-                        NOMBRES_CLIENTE,
-                        APELLIDOS_CLIENTE,
-                        ESTADO_CIVIL,
-                        CEDULA_CONYUGE,
-                        NOMBRES_CONYUGE,
-                        APELLIDOS_CONYUGE,
-                        CEDULA_CODEUDOR,
-                        NOMBRES_CODEUDOR,
-                        APELLIDOS_CODEUDOR,
-                        ESTADO_CONSULTA,
-                        FECHA_CREACION_SOLICITUD,
-                        FECHA_CREACION_REGISTRO,
-                        FECHA_ULTIMA_CONSULTA
-                    ) VALUES (
-                        :id,
-                        :id_solicitud,
-                        :estado,
-                        :agencia,
-                        :id_producto,
-                        :producto,
-                        :cedula,
-                        :nombres_cliente,
-                        :apellidos_cliente,
-                        :estado_civil,
-                        :cedula_conyuge,
-                        :nombres_conyuge,
-                        :apellidos_conyuge,
-                        :cedula_codeudor,
-                        :nombres_codeudor,
-                        :apellidos_codeudor,
-                        :estado_consulta,
-                        :fecha_creacion_solicitud,
-                        :fecha_creacion_registro,
-                        :fecha_ultima_consulta
-                    )
-                """),
-                {
-                    "id": row["ID_SOLICITUD"],
-                    "id_solicitud": row["ID_SOLICITUD"],
-                    "estado": row["ESTADO"],
-                    "agencia": row["AGENCIA"],
-                    "id_producto": row["ID_PRODUCTO"],
-                    "producto": row["PRODUCTO"],
-                    "cedula": row["CEDULA"],
-                    "nombres_cliente": row["NOMBRES_CLIENTE"],
-                    "apellidos_cliente": row["APELLIDOS_CLIENTE"],
-                    "estado_civil": row["ESTADO_CIVIL"],
-                    "cedula_conyuge": row["CEDULA_CONYUGE"],
-                    "nombres_conyuge": row["NOMBRES_CONYUGE"],
-                    "apellidos_conyuge": row["APELLIDOS_CONYUGE"],
-                    "cedula_codeudor": row["CEDULA_CODEUDOR"],
-                    "nombres_codeudor": row["NOMBRES_CODEUDOR"],
-                    "apellidos_codeudor": row["APELLIDOS_CODEUDOR"],
-                    "estado_consulta": "Pendiente",
-                    "fecha_creacion_solicitud": row["FECHA_CREACION_SOLICITUD"],
-                    "fecha_creacion_registro": datetime.now(),
-                    "fecha_ultima_consulta": None
-                }
-            )
-            contador += 1
-            
-        except Exception as e:
-            print(f"⚠️ Error insertando registro {row['ID_SOLICITUD']}: {e}")
-            continue
+        registro = {col: row[col] for col in _COLUMNAS_ORIGEN}
+        registro["ESTADO_CONSULTA"] = "Pendiente"
+        registro["FECHA_CREACION_REGISTRO"] = ahora
+        lote.append(registro)
+
+        if len(lote) >= BATCH_SIZE:
+            contador += _insertar_lote(destino_db, lote)
+            lote = []
 
-    destino_db.commit()
-    print(f"✅ {contador} registros cargados en de_clientes_rpa_v2")
\ No newline at end of file
+    if lote:
+        contador += _insertar_lote(destino_db, lote)
+
+    print(f"✅ {contador} registros cargados en de_clientes_rpa_v2")
@@ -10,9 +10,10 @@ Funciona correctamente para:
 El encabezado profesional (7 campos) se incluye en TODOS los casos.
 """
 
+import io
 import os
 from datetime import datetime, date
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 from docx import Document
 from docx.shared import Pt, Cm, Inches
@@ -33,6 +34,19 @@ def _ensure_reports_dir() -> str:
     return reports_dir
 
 
+def guardar_docx(doc: Document, out_path: str) -> int:
+    """
+    Serializa el documento en memoria y lo escribe de una vez.
+    Retorna el tamaño en bytes: quien guarda el reporte no necesita stat() del archivo.
+    """
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    contenido = buffer.getbuffer()
+    with open(out_path, "wb") as f:
+        f.write(contenido)
+    return contenido.nbytes
+
+
 def _set_doc_defaults(doc: Document):
     # Márgenes 2.54cm (estándar)
     section = doc.sections[0]
@@ -128,7 +142,7 @@ def _human_name(tipo: str) -> str:
     return mapping.get(tipo, tipo)
 
 
-def build_report_docx(job_id: str, meta: Dict[str, Any], results: Dict[str, Any]) -> str:
+def build_report_docx(job_id: str, meta: Dict[str, Any], results: Dict[str, Any]) -> Tuple[str, int]:
     """
     Construye un DOCX profesional con:
     - Encabezado tabular con datos del cliente (7 campos)
@@ -175,7 +189,7 @@ def build_report_docx(job_id: str, meta: Dict[str, Any], results: Dict[str, Any]
         }
     
     Returns:
-        Ruta absoluta del archivo .docx generado
+        Tupla (ruta absoluta del .docx generado, tamaño en bytes)
     """
     reports_dir = _ensure_reports_dir()
 
@@ -316,5 +330,5 @@ def build_report_docx(job_id: str, meta: Dict[str, Any], results: Dict[str, Any]
     # Guardar
     filename = f"report_{job_id}.docx"
     out_path = os.path.abspath(os.path.join(reports_dir, filename))
-    doc.save(out_path)
-    return out_path
\ No newline at end of file
+    tamano_bytes = guardar_docx(doc, out_path)
+    return out_path, tamano_bytes
\ No newline at end of file
@@ -4,10 +4,11 @@
 Servicio profesional de tracking actualizado para usar de_clientes_rpa_v2
 """
 
+import time
 from typing import List, Dict, Any, Optional
 from datetime import datetime, date
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from sqlalchemy.orm import Session, raiseload, selectinload, load_only
+from sqlalchemy import and_, or_, desc, select, bindparam
 
 from app.db import SessionLocal
 from app.db.models import DeClienteV2  # ✅ NUEVA TABLA
@@ -26,7 +27,8 @@ def get_paginas_activas() -> List[Dict[str, Any]]:
     """
     db = get_db_session()
     try:
-        paginas = db.query(DePagina).filter(
+        # raiseload: lectura plana, cualquier lazy load accidental debe fallar (evita N+1)
+        paginas = db.query(DePagina).options(raiseload("*")).filter(
             DePagina.activa == True
         ).order_by(DePagina.orden_display, DePagina.nombre).all()
         
@@ -45,10 +47,53 @@ def get_paginas_activas() -> List[Dict[str, Any]]:
     finally:
         db.close()
 
+# Caché TTL del catálogo de páginas (cambia muy rara vez)
+PAGINAS_CACHE_TTL = 300  # segundos (POST /paginas/refresh invalida antes)
+_paginas_cache: Dict[str, Any] = {"ts": 0.0, "data": None}
+
+def get_paginas_activas_cached(ttl: float = PAGINAS_CACHE_TTL) -> List[Dict[str, Any]]:
+    """
+    Igual que get_paginas_activas() pero reutiliza el resultado durante `ttl` segundos.
+    Pensado para endpoints muy consultados (health checks, probes del balanceador).
+    """
+    ahora = time.monotonic()
+    if _paginas_cache["data"] is None or ahora - _paginas_cache["ts"] > ttl:
+        _paginas_cache["data"] = get_paginas_activas()
+        _paginas_cache["ts"] = ahora
+    return _paginas_cache["data"]
+
+# Catálogo de páginas activas por código: se carga una vez por proceso y se
+# invalida con refrescar_cache_paginas() (POST /api/tracking/paginas/refresh)
+_paginas_por_codigo: Optional[Dict[str, Dict[str, Any]]] = None
+
+def get_paginas_por_codigo() -> Dict[str, Dict[str, Any]]:
+    """Páginas activas indexadas por código ({codigo: {id, nombre, codigo}})"""
+    global _paginas_por_codigo
+    if _paginas_por_codigo is None:
+        db = get_db_session()
+        try:
+            filas = db.execute(
+                select(DePagina.id, DePagina.nombre, DePagina.codigo).where(DePagina.activa == True)
+            ).all()
+            _paginas_por_codigo = {
+                f.codigo: {"id": f.id, "nombre": f.nombre, "codigo": f.codigo}
+                for f in filas
+            }
+        finally:
+            db.close()
+    return _paginas_por_codigo
+
+def refrescar_cache_paginas() -> int:
+    """Descarta los cachés del catálogo de páginas y lo recarga. Retorna nº de páginas activas."""
+    global _paginas_por_codigo
+    _paginas_por_codigo = None
+    _paginas_cache["data"] = None
+    return len(get_paginas_por_codigo())
+
 def get_clientes_with_filters(
     estado: Optional[str] = None,
-    fecha_desde: Optional[str] = None,
-    fecha_hasta: Optional[str] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
     q: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
@@ -75,20 +120,12 @@ def get_clientes_with_filters(
             
             query = query.filter(DeClienteV2.ESTADO_CONSULTA == estado_bd)
         
-        # Filtrar por rango de fechas
+        # Filtrar por rango de fechas (ya parseadas y validadas por FastAPI)
         if fecha_desde:
-            try:
-                fecha_desde_dt = datetime.strptime(fecha_desde, "%Y-%m-%d").date()
-                query = query.filter(DeClienteV2.FECHA_CREACION_SOLICITUD >= fecha_desde_dt)
-            except ValueError:
-                pass  # Ignorar fecha inválida
+            query = query.filter(DeClienteV2.FECHA_CREACION_SOLICITUD >= fecha_desde)
         
         if fecha_hasta:
-            try:
-                fecha_hasta_dt = datetime.strptime(fecha_hasta, "%Y-%m-%d").date()
-                query = query.filter(DeClienteV2.FECHA_CREACION_SOLICITUD <= fecha_hasta_dt)
-            except ValueError:
-                pass  # Ignorar fecha inválida
+            query = query.filter(DeClienteV2.FECHA_CREACION_SOLICITUD <= fecha_hasta)
         
         # Búsqueda por nombre, apellido, CI
         if q and q.strip():
@@ -151,7 +188,7 @@ def update_cliente_estado(
     """
     db = get_db_session()
     try:
-        cliente = db.query(DeClienteV2).filter(DeClienteV2.id == cliente_id).first()
+        cliente = db.get(DeClienteV2, cliente_id)
         
         if not cliente:
             return False
@@ -172,59 +209,70 @@ def update_cliente_estado(
     finally:
         db.close()
 
+def _requiere_cedula(cliente: DeClienteV2, nombre_pagina: str) -> Optional[str]:
+    if not cliente.CEDULA or len(str(cliente.CEDULA)) != 10:
+        return f"{nombre_pagina} requiere CI válida (10 dígitos)"
+    return None
+
+def _requiere_nombre_completo(cliente: DeClienteV2, nombre_pagina: str) -> Optional[str]:
+    if not cliente.NOMBRES_CLIENTE or not cliente.APELLIDOS_CLIENTE:
+        return f"{nombre_pagina} requiere nombre y apellido completos"
+    return None
+
+# Códigos de página según el dato del cliente que necesitan.
+# 'ruc' no tiene validador: el RUC no está en V2.
+CODIGOS_REQUIEREN_CEDULA = frozenset({
+    'deudas', 'mercado_valores', 'supercias_persona',
+    'contraloria', 'predio_quito', 'predio_manta', 'interpol'
+})
+CODIGOS_REQUIEREN_NOMBRE = frozenset({'denuncias', 'google'})
+
+# Validación de datos del cliente por código de página (construido una vez al importar)
+VALIDADORES_POR_CODIGO = {
+    **dict.fromkeys(CODIGOS_REQUIEREN_CEDULA, _requiere_cedula),
+    **dict.fromkeys(CODIGOS_REQUIEREN_NOMBRE, _requiere_nombre_completo),
+}
+
 def validar_datos_cliente_para_paginas(
     cliente_id: int,
-    paginas_codigos: List[str]
+    paginas_codigos: List[str],
+    cliente: Optional[DeClienteV2] = None
 ) -> List[str]:
     """
     Valida que el cliente tenga los datos necesarios para consultar las páginas especificadas.
+    Si el llamador ya tiene cargado el cliente lo pasa en `cliente` y no se vuelve a consultar.
     
     Retorna lista de errores (vacía si todo está bien).
     """
-    db = get_db_session()
+    db = None if cliente is not None else get_db_session()
     try:
-        # Obtener cliente
-        cliente = db.query(DeClienteV2).filter(DeClienteV2.id == cliente_id).first()
+        # Obtener cliente (solo si no viene ya cargado)
+        if cliente is None:
+            cliente = db.get(DeClienteV2, cliente_id)
         if not cliente:
             return ["Cliente no encontrado"]
         
-        # Obtener páginas
-        paginas = db.query(DePagina).filter(
-            DePagina.codigo.in_(paginas_codigos),
-            DePagina.activa == True
-        ).all()
-        
-        if len(paginas) != len(paginas_codigos):
-            paginas_encontradas = [p.codigo for p in paginas]
-            paginas_faltantes = [c for c in paginas_codigos if c not in paginas_encontradas]
+        # Obtener páginas (catálogo cacheado, sin query)
+        catalogo = get_paginas_por_codigo()
+        paginas_faltantes = [c for c in paginas_codigos if c not in catalogo]
+        if paginas_faltantes:
             return [f"Páginas no encontradas o inactivas: {', '.join(paginas_faltantes)}"]
         
+        paginas = [catalogo[c] for c in dict.fromkeys(paginas_codigos)]
         errores = []
         
-        # Validar datos según página
+        # Validar datos según página (dispatch por código; páginas sin requisitos se omiten)
         for pagina in paginas:
-            codigo = pagina.codigo
-            
-            # Mapeo de validaciones por página
-            if codigo in ['ruc']:
-                # RUC no está en V2, saltar
-                pass
-            
-            elif codigo in ['deudas', 'mercado_valores', 'supercias_persona']:
-                if not cliente.CEDULA or len(str(cliente.CEDULA)) != 10:
-                    errores.append(f"{pagina.nombre} requiere CI válida (10 dígitos)")
-            
-            elif codigo in ['contraloria', 'predio_quito', 'predio_manta', 'interpol']:
-                if not cliente.CEDULA or len(str(cliente.CEDULA)) != 10:
-                    errores.append(f"{pagina.nombre} requiere CI válida (10 dígitos)")
-            
-            elif codigo in ['denuncias', 'google']:
-                if not cliente.NOMBRES_CLIENTE or not cliente.APELLIDOS_CLIENTE:
-                    errores.append(f"{pagina.nombre} requiere nombre y apellido completos")
+            validador = VALIDADORES_POR_CODIGO.get(pagina["codigo"])
+            if validador is not None:
+                error = validador(cliente, pagina["nombre"])
+                if error:
+                    errores.append(error)
         
         return errores
     finally:
-        db.close()
+        if db is not None:
+            db.close()
 
 def crear_proceso_completo(
     cliente_id: int,
@@ -240,12 +288,12 @@ def crear_proceso_completo(
     db = get_db_session()
     try:
         # 1. Validar que el cliente existe
-        cliente = db.query(DeClienteV2).filter(DeClienteV2.id == cliente_id).first()
+        cliente = db.get(DeClienteV2, cliente_id)
         if not cliente:
             raise ValueError("Cliente no encontrado")
         
         # 2. Validar datos del cliente para las páginas
-        errores = validar_datos_cliente_para_paginas(cliente_id, paginas_codigos)
+        errores = validar_datos_cliente_para_paginas(cliente_id, paginas_codigos, cliente=cliente)
         if errores:
             raise ValueError(f"Datos insuficientes: {'; '.join(errores)}")
         
@@ -254,32 +302,33 @@ def crear_proceso_completo(
             cliente_id=cliente_id,
             job_id=job_id,
             estado='Pendiente',
-            fecha_creacion=datetime.now(),
             headless=headless,
             generate_report=generate_report,
             total_paginas_solicitadas=len(paginas_codigos)
         )
         
         db.add(proceso)
-        db.commit()
+        # flush (no commit) para obtener el id: un commit aquí expiraría el
+        # proceso y leer proceso.id volvería a consultarlo con sus relaciones
+        db.flush()
+        proceso_id = proceso.id
         
-        # 4. Crear consultas para cada página
-        paginas = db.query(DePagina).filter(
-            DePagina.codigo.in_(paginas_codigos)
-        ).all()
+        # 4. Crear consultas para cada página (ids desde el catálogo cacheado)
+        catalogo = get_paginas_por_codigo()
+        paginas = [catalogo[c] for c in dict.fromkeys(paginas_codigos) if c in catalogo]
         
         for pagina in paginas:
             consulta = DeConsulta(
-                proceso_id=proceso.id,
-                pagina_id=pagina.id,
-                estado='Pendiente',
-                fecha_creacion=datetime.now()
+                proceso_id=proceso_id,
+                pagina_id=pagina["id"],
+                estado='Pendiente'
             )
             db.add(consulta)
         
+        # Proceso y consultas en una sola transacción
         db.commit()
         
-        return proceso.id
+        return proceso_id
         
     except Exception as e:
         db.rollback()
@@ -288,36 +337,20 @@ def crear_proceso_completo(
         db.close()
 
 def get_estadisticas(
-    fecha_desde: Optional[str] = None,
-    fecha_hasta: Optional[str] = None
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None
 ) -> Dict[str, Any]:
     """
     Obtiene estadísticas del sistema.
     """
     db = get_db_session()
     try:
-        # Parsear fechas
-        fecha_desde_dt = None
-        fecha_hasta_dt = None
-        
-        if fecha_desde:
-            try:
-                fecha_desde_dt = datetime.strptime(fecha_desde, "%Y-%m-%d")
-            except ValueError:
-                pass
-        
-        if fecha_hasta:
-            try:
-                fecha_hasta_dt = datetime.strptime(fecha_hasta, "%Y-%m-%d")
-            except ValueError:
-                pass
-        
         # Construir filtros
         filtro_fecha_clientes = True
-        if fecha_desde_dt:
-            filtro_fecha_clientes = and_(filtro_fecha_clientes, DeClienteV2.FECHA_CREACION_SOLICITUD >= fecha_desde_dt.date())
-        if fecha_hasta_dt:
-            filtro_fecha_clientes = and_(filtro_fecha_clientes, DeClienteV2.FECHA_CREACION_SOLICITUD <= fecha_hasta_dt.date())
+        if fecha_desde:
+            filtro_fecha_clientes = and_(filtro_fecha_clientes, DeClienteV2.FECHA_CREACION_SOLICITUD >= fecha_desde)
+        if fecha_hasta:
+            filtro_fecha_clientes = and_(filtro_fecha_clientes, DeClienteV2.FECHA_CREACION_SOLICITUD <= fecha_hasta)
         
         # Estadísticas de clientes V2
         total_clientes = db.query(DeClienteV2).filter(filtro_fecha_clientes).count()
@@ -336,10 +369,10 @@ def get_estadisticas(
         
         # Estadísticas de procesos
         filtro_fecha_procesos = True
-        if fecha_desde_dt:
-            filtro_fecha_procesos = and_(filtro_fecha_procesos, DeProceso.fecha_creacion >= fecha_desde_dt)
-        if fecha_hasta_dt:
-            filtro_fecha_procesos = and_(filtro_fecha_procesos, DeProceso.fecha_creacion <= fecha_hasta_dt)
+        if fecha_desde:
+            filtro_fecha_procesos = and_(filtro_fecha_procesos, DeProceso.fecha_creacion >= datetime.combine(fecha_desde, datetime.min.time()))
+        if fecha_hasta:
+            filtro_fecha_procesos = and_(filtro_fecha_procesos, DeProceso.fecha_creacion <= datetime.combine(fecha_hasta, datetime.min.time()))
         
         total_procesos = db.query(DeProceso).filter(filtro_fecha_procesos).count()
         procesos_completados = db.query(DeProceso).filter(
@@ -372,12 +405,29 @@ def get_estadisticas(
 
 def get_proceso_by_job_id(job_id: str) -> Optional[Dict[str, Any]]:
     """
-    Obtiene información de un proceso por su job_id.
+    Obtiene información de un proceso por su job_id, incluyendo sus consultas.
     Se usa en routers para obtener detalles del proceso.
+
+    Las relaciones que se leen se cargan explícitamente (selectinload) y el resto
+    queda en raiseload: un acceso no planificado lanza error en vez de hacer N+1.
     """
     db = get_db_session()
     try:
-        proceso = db.query(DeProceso).filter(DeProceso.job_id == job_id).first()
+        stmt = (
+            select(DeProceso)
+            .where(DeProceso.job_id == job_id)
+            .options(
+                selectinload(DeProceso.consultas).options(
+                    load_only(
+                        DeConsulta.id, DeConsulta.pagina_id, DeConsulta.estado, DeConsulta.escenario,
+                        DeConsulta.fecha_inicio, DeConsulta.fecha_fin
+                    ),
+                    selectinload(DeConsulta.pagina).load_only(DePagina.id, DePagina.codigo),
+                ),
+                raiseload("*"),
+            )
+        )
+        proceso = db.execute(stmt).scalars().first()
         
         if not proceso:
             return None
@@ -392,7 +442,208 @@ def get_proceso_by_job_id(job_id: str) -> Optional[Dict[str, Any]]:
             'fecha_fin': proceso.fecha_fin.isoformat() if proceso.fecha_fin else None,
             'total_paginas_solicitadas': proceso.total_paginas_solicitadas,
             'total_paginas_exitosas': proceso.total_paginas_exitosas,
-            'total_paginas_fallidas': proceso.total_paginas_fallidas
+            'total_paginas_fallidas': proceso.total_paginas_fallidas,
+            'consultas': [
+                {
+                    'id': c.id,
+                    'pagina_codigo': c.pagina.codigo if c.pagina else None,
+                    'estado': c.estado,
+                    'escenario': c.escenario,
+                    'fecha_inicio': c.fecha_inicio.isoformat() if c.fecha_inicio else None,
+                    'fecha_fin': c.fecha_fin.isoformat() if c.fecha_fin else None
+                }
+                for c in proceso.consultas
+            ]
         }
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Columnas de de_reportes_rpa que exponen los listados (sin data_snapshot ni
+# checksum): se seleccionan como Row planos, sin hidratar entidades ORM
+_COLUMNAS_REPORTE = (
+    DeReporte.id,
+    DeReporte.proceso_id,
+    DeReporte.cliente_id,
+    DeReporte.job_id,
+    DeReporte.tipo_alerta,
+    DeReporte.monto_usd,
+    DeReporte.fecha_alerta,
+    DeReporte.nombre_archivo,
+    DeReporte.tipo_archivo,
+    DeReporte.tamano_bytes,
+    DeReporte.generado_exitosamente,
+    DeReporte.fecha_generacion,
+)
+
+def _reporte_a_dict(fila: Any, con_cliente: bool = False) -> Dict[str, Any]:
+    """
+    Serializa una fila de _COLUMNAS_REPORTE y, si con_cliente, los datos básicos del cliente.
+    Las fechas quedan como datetime: los endpoints responden con ORJSONResponse.
+    """
+    return {
+        'id': fila.id,
+        'proceso_id': fila.proceso_id,
+        'cliente_id': fila.cliente_id,
+        'job_id': fila.job_id,
+        'tipo_alerta': fila.tipo_alerta,
+        'monto_usd': float(fila.monto_usd) if fila.monto_usd is not None else None,
+        'fecha_alerta': fila.fecha_alerta,
+        'nombre_archivo': fila.nombre_archivo,
+        'tipo_archivo': fila.tipo_archivo,
+        'tamano_bytes': fila.tamano_bytes,
+        'generado_exitosamente': fila.generado_exitosamente,
+        'fecha_generacion': fila.fecha_generacion,
+        'cliente': {
+            'cedula': fila.CEDULA,
+            'nombres': fila.NOMBRES_CLIENTE,
+            'apellidos': fila.APELLIDOS_CLIENTE
+        } if con_cliente else None
+    }
+
+# Sentencias de reportes construidas una sola vez al importar: se reutiliza el
+# mismo objeto en cada request y SQLAlchemy sirve la compilación desde su caché
+# (query_cache_size del engine). Los valores viajan como bindparam.
+_STMT_REPORTES_BASE = (
+    select(
+        *_COLUMNAS_REPORTE,
+        DeClienteV2.CEDULA,
+        DeClienteV2.NOMBRES_CLIENTE,
+        DeClienteV2.APELLIDOS_CLIENTE,
+    )
+    .join(DeClienteV2, DeClienteV2.id == DeReporte.cliente_id)
+    .order_by(DeReporte.fecha_generacion.desc(), DeReporte.id.desc())
+)
+
+def _stmt_reportes(por_tipo: bool, con_cursor: bool):
+    """Variante del listado de reportes para una combinación de filtros (todo con bindparams)"""
+    stmt = _STMT_REPORTES_BASE
+    if por_tipo:
+        stmt = stmt.where(DeReporte.tipo_alerta == bindparam("tipo_alerta"))
+    if con_cursor:
+        # Keyset: (fecha_generacion, id) < (:cursor_fecha, :cursor_id)
+        stmt = stmt.where(or_(
+            DeReporte.fecha_generacion < bindparam("cursor_fecha"),
+            and_(
+                DeReporte.fecha_generacion == bindparam("cursor_fecha"),
+                DeReporte.id < bindparam("cursor_id"),
+            ),
+        ))
+    return stmt
+
+_STMT_REPORTES = {
+    (por_tipo, con_cursor): _stmt_reportes(por_tipo, con_cursor)
+    for por_tipo in (False, True)
+    for con_cursor in (False, True)
+}
+
+_STMT_REPORTES_CLIENTE = (
+    select(*_COLUMNAS_REPORTE)
+    .where(DeReporte.cliente_id == bindparam("cliente_id"))
+    .order_by(DeReporte.fecha_generacion.desc(), DeReporte.id.desc())
+)
+_STMT_PROCESOS_DE_REPORTES = (
+    select(DeProceso.id, DeProceso.job_id, DeProceso.estado, DeProceso.fecha_fin)
+    .where(DeProceso.id.in_(bindparam("proceso_ids", expanding=True)))
+)
+
+def _encode_cursor_reporte(reporte: Any) -> str:
+    """Cursor keyset: '<fecha_generacion ISO>|<id>' del último reporte devuelto"""
+    return f"{reporte.fecha_generacion.isoformat()}|{reporte.id}"
+
+def _decode_cursor_reporte(cursor: str):
+    try:
+        ts, reporte_id = cursor.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(reporte_id)
+    except ValueError:
+        raise ValueError("Cursor inválido")
+
+def listar_reportes_tracking(
+    tipo_alerta: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Lista paginada (keyset) de los reportes de de_reportes_rpa con los datos del cliente.
+
+    Reporte y cliente salen de un único SELECT con JOIN (no una consulta
+    de cliente por cada reporte). Retorna {"items": [...], "next_cursor": str|None};
+    next_cursor se pasa tal cual para pedir la página siguiente.
+    """
+    params: Dict[str, Any] = {}
+    if tipo_alerta:
+        params["tipo_alerta"] = tipo_alerta
+    if cursor:
+        params["cursor_fecha"], params["cursor_id"] = _decode_cursor_reporte(cursor)
+
+    # +1 para saber si existe una página siguiente
+    stmt = _STMT_REPORTES[(bool(tipo_alerta), bool(cursor))].limit(limit + 1)
+
+    db = get_db_session()
+    try:
+        filas = db.execute(stmt, params).all()
+    finally:
+        db.close()
+
+    next_cursor = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        next_cursor = _encode_cursor_reporte(filas[-1])
+
+    return {
+        "items": [_reporte_a_dict(fila, con_cliente=True) for fila in filas],
+        "next_cursor": next_cursor
+    }
+
+def obtener_reportes_cliente(cliente_id: int) -> List[Dict[str, Any]]:
+    """
+    Reportes de un cliente con el estado de su proceso.
+
+    Los procesos se precargan con un único SELECT ... WHERE id IN (...) y se
+    resuelven con un dict, en vez de consultar de_procesos_rpa por cada reporte.
+    """
+    db = get_db_session()
+    try:
+        reportes = db.execute(_STMT_REPORTES_CLIENTE, {"cliente_id": cliente_id}).all()
+
+        proceso_ids = {r.proceso_id for r in reportes}
+        procesos = {}
+        if proceso_ids:
+            procesos = {
+                p.id: p
+                for p in db.execute(_STMT_PROCESOS_DE_REPORTES, {"proceso_ids": list(proceso_ids)})
+            }
+
+        resultado = []
+        for reporte in reportes:
+            item = _reporte_a_dict(reporte)
+            proceso = procesos.get(reporte.proceso_id)
+            item['proceso'] = {
+                'job_id': proceso.job_id,
+                'estado': proceso.estado,
+                'fecha_fin': proceso.fecha_fin
+            } if proceso else None
+            resultado.append(item)
+        return resultado
+    finally:
+        db.close()
+
+def get_reporte_para_descarga(proceso_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Último reporte generado con éxito de un proceso: solo ruta y nombre de archivo.
+    """
+    db = get_db_session()
+    try:
+        fila = db.execute(
+            select(DeReporte.ruta_archivo, DeReporte.nombre_archivo)
+            .where(
+                DeReporte.proceso_id == proceso_id,
+                DeReporte.generado_exitosamente == True
+            )
+            .order_by(DeReporte.fecha_generacion.desc(), DeReporte.id.desc())
+            .limit(1)
+        ).first()
+        if not fila or not fila.ruta_archivo:
+            return None
+        return {"ruta_archivo": fila.ruta_archivo, "nombre_archivo": fila.nombre_archivo}
+    finally:
+        db.close()
@@ -0,0 +1,8 @@
+# app/utils/__init__.py
+"""
+Utilidades transversales de la aplicación (instrumentación, helpers).
+"""
+
+from app.utils.query_counter import count_queries
+
+__all__ = ["count_queries"]
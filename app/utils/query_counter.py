@@ -0,0 +1,38 @@
+# app/utils/query_counter.py
+"""
+Contador de queries SQL basado en eventos de SQLAlchemy.
+
+Pensado para tests / desarrollo: detecta regresiones N+1 comprobando
+cuántas sentencias emite una operación.
+
+Uso:
+    from app.db import engine
+    from app.utils.query_counter import count_queries
+
+    with count_queries(engine) as queries:
+        list_lista(...)
+    assert len(queries) <= 2, queries
+"""
+
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+
+
+@contextmanager
+def count_queries(conn) -> Iterator[List[str]]:
+    """
+    Registra cada sentencia ejecutada sobre `conn` (Engine o Connection)
+    mientras dura el bloque. Devuelve la lista de SQL emitidos.
+    """
+    queries: List[str] = []
+
+    def _before_cursor_execute(conn_, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    event.listen(conn, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield queries
+    finally:
+        event.remove(conn, "before_cursor_execute", _before_cursor_execute)
@@ -1,10 +1,32 @@
-import os, json
+import os, json, sys, atexit, logging, queue
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime, timedelta
 from ..config import OUTPUT_DIR, CACHE_HOURS
 
+# Los llamadores solo encolan el registro; la escritura en stdout la hace
+# el hilo del QueueListener, fuera de requests y del bucle del scraper.
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+_log_listener = QueueListener(_log_queue, _stdout_handler)
+# LOG_LEVEL=DEBUG muestra también los mensajes de latido (espera entre ciclos, caché)
+_LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger que solo encola en la cola compartida (lo escribe el QueueListener)."""
+    lg = logging.getLogger(name)
+    if not lg.handlers:
+        lg.setLevel(_LOG_LEVEL)
+        lg.addHandler(QueueHandler(_log_queue))
+        lg.propagate = False
+    return lg
+
+logger = get_logger("consultas")
+
 def log(msg: str):
-    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{ts}] {msg}", flush=True)
+    logger.info(msg)
 
 def load_cache():
     path = os.path.join(OUTPUT_DIR, "cache.json")
@@ -4,17 +4,20 @@ Consulta de Función Judicial con navegación automática por TODAS las páginas
 Versión V25: Movimientos humanos completos, paginación automática, modo headless.
 """
 
+import re
 import time
 import random
+import traceback
 from typing import Optional, Dict, List
 from datetime import datetime
 
 from selenium.webdriver.common.by import By
+from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
-from core.browser import create_driver, close_driver
+from core.browser import create_driver, close_driver, save_cookies
 from core.utils.log import log
 from core.utils.screenshot import save_fullpage_png
 from core.human import (
@@ -36,10 +39,13 @@ from core.config import MAX_RETRIES
 FUNCION_JUDICIAL_URL = "https://procesosjudiciales.funcionjudicial.gob.ec/busqueda-filtros"
 
 
+# Caracteres que no van en nombres de archivo (compilado una vez)
+_SLUG_INVALIDOS = re.compile(r'[^\w\s-]')
+
+
 def _slug(text: str) -> str:
     """Genera slug para nombres de archivo"""
-    import re
-    return re.sub(r'[^\w\s-]', '', text).strip().replace(' ', '_').lower()
+    return _SLUG_INVALIDOS.sub('', text).strip().replace(' ', '_').lower()
 
 
 def _save_screenshot(driver, basename: str) -> str:
@@ -461,7 +467,6 @@ def capture_all_result_pages(driver, base_name: str, max_pages: int = 50) -> Lis
         if not click_success:
             try:
                 log("Intentando click directo...")
-                from selenium.webdriver.common.action_chains import ActionChains
                 actions = ActionChains(driver)
                 actions.move_to_element(next_button)
                 actions.pause(random.uniform(0.3, 0.6))
@@ -541,12 +546,19 @@ def capture_all_result_pages(driver, base_name: str, max_pages: int = 50) -> Lis
 
 # ============= PROCESO PRINCIPAL =============
 
-def process_funcion_judicial_once(apellidos_nombres: str, headless: bool = True) -> Optional[Dict]:
+def process_funcion_judicial_once(
+    apellidos_nombres: str,
+    headless: bool = True,
+    driver=None
+) -> Optional[Dict]:
     """
     Ejecuta UNA consulta en Función Judicial.
     Versión V25: Incluye secuencia especial de clics y paginación automática.
+    
+    Con `driver` se reutiliza un navegador ya abierto (ver FuncionJudicialSession)
+    y NO se cierra al terminar; sin él se crea y se cierra uno para esta consulta.
     """
-    driver = None
+    driver_propio = driver is None
     
     try:
         log("=" * 60)
@@ -555,8 +567,9 @@ def process_funcion_judicial_once(apellidos_nombres: str, headless: bool = True)
         log(f"Modo headless: {headless}")
         log("=" * 60)
         
-        # 1. Crear driver CON cookies persistentes
-        driver = create_driver(headless=headless, use_cookies=True, cookies_domain="funcionjudicial")
+        # 1. Crear driver CON cookies persistentes (salvo que se reutilice uno)
+        if driver_propio:
+            driver = create_driver(headless=headless, use_cookies=True, cookies_domain="funcionjudicial")
         
         # 2. Navegar a la página
         log(f"Navegando a: {FUNCION_JUDICIAL_URL}")
@@ -781,7 +794,6 @@ def process_funcion_judicial_once(apellidos_nombres: str, headless: bool = True)
         
     except Exception as e:
         log(f"ERROR EN CONSULTA: {e}")
-        import traceback
         traceback.print_exc()
         
         if driver:
@@ -790,14 +802,59 @@ def process_funcion_judicial_once(apellidos_nombres: str, headless: bool = True)
         return None
         
     finally:
-        if driver:
+        if driver_propio and driver:
             log("Cerrando driver y guardando cookies...")
             try:
-                close_driver(driver, save_cookies_flag=True, cookies_domain="funcionjudicial")
+                close_driver(driver, save=True, cookies_domain="funcionjudicial")
             except Exception:
                 pass
 
 
+class FuncionJudicialSession:
+    """
+    Navegador reutilizable entre consultas: el arranque de Chrome (y la carga
+    de cookies) se paga una vez y no por cliente.
+    
+        with FuncionJudicialSession(headless=True) as sesion:
+            resultado = sesion.run("APELLIDOS NOMBRES")
+    
+    Un driver de Selenium no es thread-safe: una sesión por hilo.
+    """
+    
+    def __init__(self, headless: bool = True):
+        self.headless = headless
+        self.driver = None
+    
+    def run(self, apellidos_nombres: str) -> Optional[Dict]:
+        if self.driver is None:
+            self.driver = create_driver(headless=self.headless, use_cookies=True, cookies_domain="funcionjudicial")
+        
+        resultado = process_funcion_judicial_once(apellidos_nombres, headless=self.headless, driver=self.driver)
+        
+        if resultado is None:
+            # Error a mitad de consulta: el navegador queda en estado desconocido,
+            # se descarta y la próxima consulta abre uno nuevo
+            self.close()
+        else:
+            save_cookies(self.driver, "funcionjudicial")
+        return resultado
+    
+    def close(self):
+        if self.driver:
+            log("Cerrando driver y guardando cookies...")
+            try:
+                close_driver(self.driver, save=True, cookies_domain="funcionjudicial")
+            except Exception:
+                pass
+            self.driver = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
 def process_funcion_judicial(apellidos_nombres: str, headless: bool = True) -> Optional[Dict]:
     """
     Ejecuta consulta en Función Judicial con reintentos.
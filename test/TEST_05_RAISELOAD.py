@@ -0,0 +1,90 @@
+# TEST_05_RAISELOAD.py
+"""
+TEST 5: Verificar que los endpoints de lectura no disparan lazy loads
+- Las consultas de lectura usan raiseload("*")
+- Si algún código accede a una relación no cargada explícitamente,
+  SQLAlchemy lanza InvalidRequestError y el endpoint responde 500
+
+EJECUCIÓN (servidor corriendo en localhost:8000, BD con datos):
+python TEST_05_RAISELOAD.py [job_id]
+"""
+
+import sys
+import json
+import requests
+
+BASE_URL = "http://localhost:8000"
+
+
+def _sin_error_de_carga(response) -> bool:
+    """True si la respuesta no proviene de un lazy load bloqueado por raiseload"""
+    texto = response.text
+    return "InvalidRequestError" not in texto and "DetachedInstanceError" not in texto
+
+
+def test_daemon_estado():
+    """GET /api/daemon/estado"""
+    print("\n" + "="*70)
+    print("TEST 1: GET /api/daemon/estado")
+    print("="*70)
+    try:
+        response = requests.get(f"{BASE_URL}/api/daemon/estado")
+        print(f"Status: {response.status_code}")
+        print(json.dumps(response.json(), indent=2, ensure_ascii=False))
+        return response.status_code == 200 and _sin_error_de_carga(response)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+
+def test_paginas():
+    """GET /api/tracking/paginas"""
+    print("\n" + "="*70)
+    print("TEST 2: GET /api/tracking/paginas")
+    print("="*70)
+    try:
+        response = requests.get(f"{BASE_URL}/api/tracking/paginas")
+        print(f"Status: {response.status_code}")
+        print(f"Páginas: {len(response.json()) if response.ok else response.text}")
+        return response.status_code == 200 and _sin_error_de_carga(response)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+
+def test_proceso_detalle(job_id: str):
+    """GET /api/tracking/procesos/{job_id}"""
+    print("\n" + "="*70)
+    print(f"TEST 3: GET /api/tracking/procesos/{job_id}")
+    print("="*70)
+    try:
+        response = requests.get(f"{BASE_URL}/api/tracking/procesos/{job_id}")
+        print(f"Status: {response.status_code}")
+        print(json.dumps(response.json(), indent=2, ensure_ascii=False))
+        return response.status_code in (200, 404) and _sin_error_de_carga(response)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    print("\n🚀 INICIANDO TESTS DE RAISELOAD\n")
+
+    resultados = {
+        "Daemon estado": test_daemon_estado(),
+        "Páginas": test_paginas(),
+    }
+    if len(sys.argv) > 1:
+        resultados["Proceso detalle"] = test_proceso_detalle(sys.argv[1])
+
+    print("\n" + "="*70)
+    print("RESUMEN FINAL")
+    print("="*70)
+    for nombre, ok in resultados.items():
+        print(f"{nombre}: {'✅ PASS' if ok else '❌ FAIL'}")
+    print()
+
+    if all(resultados.values()):
+        print("✅ TODOS LOS TESTS PASARON")
+    else:
+        print("❌ ALGUNOS TESTS FALLARON")
@@ -0,0 +1,73 @@
+# TEST_06_CONTEO_QUERIES.py
+"""
+TEST 6: Presupuesto de queries (regresiones N+1)
+- Cuenta las sentencias SQL que emite cada operación de lectura
+- Falla si alguna supera su presupuesto
+
+EJECUCIÓN (BD destino con datos; solo en entorno de pruebas):
+ENV=test python TEST_06_CONTEO_QUERIES.py [job_id]
+"""
+
+import os
+import sys
+
+from app.db import engine
+from app.utils.query_counter import count_queries
+
+
+def _verificar(nombre: str, funcion, presupuesto: int) -> bool:
+    print("\n" + "="*70)
+    print(f"{nombre} (máximo {presupuesto} queries)")
+    print("="*70)
+    try:
+        with count_queries(engine) as queries:
+            funcion()
+        for q in queries:
+            print(f"   - {' '.join(q.split())[:120]}")
+        ok = len(queries) <= presupuesto
+        print(f"{'✅' if ok else '❌'} {len(queries)} queries")
+        return ok
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    if os.getenv("ENV") != "test":
+        print("⚠️  Ejecutar solo con ENV=test")
+        sys.exit(0)
+
+    from app.routers.lista import list_lista
+    from app.services.tracking_professional import get_paginas_activas, get_proceso_by_job_id
+
+    print("\n🚀 INICIANDO TESTS DE CONTEO DE QUERIES\n")
+
+    resultados = {
+        "GET /lista": _verificar(
+            "TEST 1: list_lista (100 registros)",
+            lambda: list_lista(estado=None, fecha_desde=None, fecha_hasta=None, q=None, limit=100, cursor=None),
+            1,
+        ),
+        "Páginas activas": _verificar("TEST 2: get_paginas_activas", get_paginas_activas, 1),
+    }
+    if len(sys.argv) > 1:
+        # proceso + consultas (selectin) + páginas (selectin)
+        resultados["Proceso detalle"] = _verificar(
+            "TEST 3: get_proceso_by_job_id",
+            lambda: get_proceso_by_job_id(sys.argv[1]),
+            3,
+        )
+
+    print("\n" + "="*70)
+    print("RESUMEN FINAL")
+    print("="*70)
+    for nombre, ok in resultados.items():
+        print(f"{nombre}: {'✅ PASS' if ok else '❌ FAIL'}")
+    print()
+
+    if all(resultados.values()):
+        print("✅ TODOS LOS TESTS PASARON")
+    else:
+        print("❌ ALGUNOS TESTS FALLARON")